@@ -0,0 +1,131 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import fitz  # PyMuPDF for page counts
+
+from resume_extract import LocalUpload, extract_text_from_docx, extract_text_from_pdf
+
+# Headless extraction of a folder of resumes into a JSONL corpus:
+#   python batch_extract.py resumes/ --output corpus.jsonl --workers 8
+# Re-running the same command after an interruption skips files that are
+# already listed in the checkpoint (<output>.checkpoint).
+
+EXTENSIONS = (".pdf", ".docx")
+
+
+def iter_resume_paths(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(EXTENSIONS) and not filename.startswith("~$"):
+                yield os.path.join(dirpath, filename)
+
+
+def _checkpoint_key(path):
+    stat = os.stat(path)
+    # A file that changed since the last run is extracted again
+    return f"{os.path.abspath(path)}\t{stat.st_size}\t{int(stat.st_mtime)}"
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def extract_file(path):
+    record = {"path": path, "sha256": None, "bytes": None, "pages": None, "chars": None,
+              "text": None, "read_seconds": None, "extract_seconds": None, "error": None}
+    try:
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            data = f.read()
+        record["read_seconds"] = time.perf_counter() - start
+        record["sha256"] = hashlib.sha256(data).hexdigest()
+        record["bytes"] = len(data)
+
+        upload = LocalUpload(path, data)
+        start = time.perf_counter()
+        # The extractors print progress for the UI; keep the CLI output clean
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            if path.lower().endswith(".pdf"):
+                with fitz.open(stream=data, filetype="pdf") as doc:
+                    record["pages"] = doc.page_count
+                # Workers are already one process per file, so no nested pool
+                text = extract_text_from_pdf(upload, parallel=False)
+            else:
+                text = extract_text_from_docx(upload)
+        record["extract_seconds"] = time.perf_counter() - start
+        if text is None:
+            # The UI extractors report failures with st.error and return None
+            # instead of raising; the last line they printed says why
+            lines = log.getvalue().strip().splitlines()
+            record["error"] = f"ExtractionFailed: {lines[-1] if lines else 'no text could be extracted'}"
+            return record
+        record["text"] = text
+        record["chars"] = len(text) if text else 0
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def _extract_with_key(item):
+    path, key = item
+    return key, extract_file(path)
+
+
+def run(root, output, workers=None, checkpoint=None):
+    checkpoint = checkpoint or output + ".checkpoint"
+    done = load_checkpoint(checkpoint)
+    pending = []
+    for path in iter_resume_paths(root):
+        key = _checkpoint_key(path)
+        if key not in done:
+            pending.append((path, key))
+
+    print(f"{len(done)} already done, {len(pending)} to extract with {workers or os.cpu_count()} workers")
+    start = time.perf_counter()
+    count = failed = 0
+    with open(output, "a", encoding="utf-8") as out, open(checkpoint, "a", encoding="utf-8") as ckpt, \
+            Pool(processes=workers) as pool:
+        for key, record in pool.imap_unordered(_extract_with_key, pending, chunksize=4):
+            # The record goes out before its checkpoint line, so a crash can at
+            # worst repeat one file, never lose one
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            ckpt.write(key + "\n")
+            ckpt.flush()
+            count += 1
+            if record["error"]:
+                failed += 1
+                print(f"failed: {record['path']}: {record['error']}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0.0
+    print(f"extracted {count} files ({failed} failed) in {elapsed:.1f}s, {rate:.1f} files/s")
+    return count, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract resume text from a folder into JSONL")
+    parser.add_argument("root", help="directory to scan for .pdf and .docx files")
+    parser.add_argument("--output", default="resumes.jsonl")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the number of cores")
+    parser.add_argument("--checkpoint", help="defaults to <output>.checkpoint")
+    args = parser.parse_args(argv)
+    _, failed = run(args.root, args.output, args.workers, args.checkpoint)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import argparse
+import contextlib
+import io
+import multiprocessing
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF, only used to count pages for pages/sec
+
+from resume_extract import LocalUpload, extract_resume_text, extract_text_from_docx, extract_text_from_pdf
+
+# Measures how fast we ingest the sample documents that ship with the repo.
+#   python bench_extraction.py run --output bench_baseline.json
+#   python bench_extraction.py run --compare bench_baseline.json
+#   python bench_extraction.py compare bench_baseline.json bench_current.json
+
+SAMPLES = [
+    "resume_sample_student8ea47e04a8fe67e6b7acff0000376a3b.pdf",
+    "EPS-Civil-Engineering.pdf",
+    "adapted_resume_and_cover_letter.docx",
+]
+DEFAULT_BASELINE = "bench_baseline.json"
+# A case is a regression when it gets this much slower (or hungrier) than baseline
+DEFAULT_TOLERANCE = 0.15
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+CASE_FUNCTIONS = {
+    "extract_text_from_pdf": extract_text_from_pdf,
+    "extract_text_from_docx": extract_text_from_docx,
+    "extract_resume_text": extract_resume_text,
+}
+
+
+def _case_rss(name, path, data):
+    # Runs in a fresh process: ru_maxrss is a high-water mark for the whole
+    # process lifetime, so only a new process gives a per-case peak
+    with contextlib.redirect_stdout(io.StringIO()):
+        CASE_FUNCTIONS[name](LocalUpload(path, data))
+    return _peak_rss_bytes()
+
+
+def _measure_rss(name, path, data):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_case_rss, name, path, data).result()
+
+
+def _page_count(path, data):
+    if not path.lower().endswith(".pdf"):
+        return None
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def _cases(path):
+    if path.lower().endswith(".pdf"):
+        yield "extract_text_from_pdf", extract_text_from_pdf
+    else:
+        yield "extract_text_from_docx", extract_text_from_docx
+    yield "extract_resume_text", extract_resume_text
+
+
+def _run_case(fn, path, data, repeat):
+    # Timing and allocation tracking are separate passes: tracemalloc slows
+    # everything down and would skew the throughput numbers
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(LocalUpload(path, data))  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            text = fn(LocalUpload(path, data))
+        seconds = (time.perf_counter() - start) / repeat
+
+        tracemalloc.start()
+        fn(LocalUpload(path, data))
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return text or "", seconds, traced_peak
+
+
+def run(paths, repeat):
+    results = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        pages = _page_count(path, data)
+        for name, fn in _cases(path):
+            text, seconds, traced_peak = _run_case(fn, path, data, repeat)
+            key = f"{name}:{os.path.basename(path)}"
+            results[key] = {
+                "seconds": seconds,
+                "bytes_per_sec": len(data) / seconds if seconds else None,
+                "pages_per_sec": pages / seconds if pages and seconds else None,
+                "pages": pages,
+                "bytes": len(data),
+                "chars": len(text),
+                "tracemalloc_peak_bytes": traced_peak,
+                "peak_rss_bytes": _measure_rss(name, path, data),
+            }
+            print(_format_row(key, results[key]))
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pymupdf": getattr(fitz, "VersionBind", None),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def _format_row(key, r):
+    pages = f"{r['pages_per_sec']:9.1f} pages/s" if r["pages_per_sec"] else " " * 15
+    return (f"{key:70s} {r['seconds'] * 1000:9.2f} ms  {r['bytes_per_sec'] / 1e6:8.2f} MB/s  {pages}  "
+            f"tracemalloc {r['tracemalloc_peak_bytes'] / 1024:9.1f} KiB  rss {r['peak_rss_bytes'] / 2**20:7.1f} MiB")
+
+
+def _change(old, new, field):
+    # Relative change, 0.0 when the baseline doesn't have the field
+    if not old.get(field) or new.get(field) is None:
+        return 0.0
+    return new[field] / old[field] - 1
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    # pages_per_sec and bytes_per_sec are derived from seconds for the same
+    # file, so the time check covers them
+    regressions = []
+    for key, new in current["results"].items():
+        old = baseline["results"].get(key)
+        if old is None:
+            print(f"{key:70s} (new case, no baseline)")
+            continue
+        time_change = _change(old, new, "seconds")
+        mem_change = _change(old, new, "tracemalloc_peak_bytes")
+        rss_change = _change(old, new, "peak_rss_bytes")
+        flag = ""
+        if max(time_change, mem_change, rss_change) > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:70s} time {time_change:+7.1%}  tracemalloc {mem_change:+7.1%}  rss {rss_change:+7.1%}{flag}")
+    for key in baseline["results"].keys() - current["results"].keys():
+        print(f"{key:70s} (missing from current run)")
+    return regressions
+
+
+def _load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark resume text extraction")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="benchmark the sample documents")
+    run_parser.add_argument("paths", nargs="*", default=SAMPLES)
+    run_parser.add_argument("--repeat", type=int, default=10)
+    run_parser.add_argument("--output", help="write results as JSON (e.g. a new baseline)")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="diff against a baseline JSON")
+    run_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    compare_parser = sub.add_parser("compare", help="diff two result files")
+    compare_parser.add_argument("baseline", nargs="?", default=DEFAULT_BASELINE)
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        current = run(args.paths, args.repeat)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+        if not args.compare:
+            return 0
+        baseline = _load(args.compare)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    regressions = compare(baseline, current, args.tolerance)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ from docx import Document
 import fitz  # PyMuPDF for PDF text extraction
 import difflib
 from fpdf import FPDF
+from text_cache import cached_extract
 # Hide Streamlit header and footer
 hide_streamlit_style = """
     <style>
@@ -105,6 +106,10 @@ def extract_text_from_docx(file):
         return None
 
 
+# Part of the extraction cache key; bump when the extractors above change their output
+EXTRACTOR_VERSION = 1
+
+
 def extract_resume_text(uploaded_file):
     if uploaded_file.type == "application/pdf":
         return extract_text_from_pdf(uploaded_file)
@@ -347,7 +352,8 @@ def main():
     uploaded_file = st.file_uploader("", type=["pdf", "docx"])
 
     if uploaded_file:
-        resume_text = extract_resume_text(uploaded_file)
+        resume_text = cached_extract(uploaded_file, extract_resume_text,
+                                     namespace=f"{uploaded_file.type}:coverletter_V2_nopw-v{EXTRACTOR_VERSION}")
         if resume_text:
             st.markdown("Extracted Resume Text Preview")
             st.text_area("Resume Text", resume_text[:8000], height=100)
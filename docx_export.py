@@ -0,0 +1,194 @@
+import re
+import threading
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.shared import Cm, Pt
+
+from resume_sections import BULLET, heading_kind
+
+# DOCX export from a styled template. The template (fonts, spacing, margins,
+# heading and list styles) is built once per process with python-docx. Only
+# word/document.xml differs between exports, so the template is kept as a zip
+# of every other part, already compressed; an export copies those bytes and
+# appends a document part whose body is the prebuilt XML of all paragraphs,
+# instead of add_paragraph() per line on a blank Document(). Headings and
+# bullets found in the generated text get the matching styles.
+
+STYLE_NAMES = {
+    "title": "Heading 1",
+    "heading": "Heading 2",
+    "bullet": "List Bullet",
+    "number": "List Number",
+    "body": "Normal",
+}
+BODY_FONT = "Calibri"
+BODY_SIZE = 11
+
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+")
+BOLD = re.compile(r"\*\*(.+?)\*\*")
+# Characters XML 1.0 doesn't allow; python-docx refuses them too
+XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+DOCUMENT_PART = "word/document.xml"
+
+_lock = threading.Lock()
+_template = None
+
+
+def _build_template():
+    doc = Document()
+    for section in doc.sections:
+        section.top_margin = section.bottom_margin = Cm(2)
+        section.left_margin = section.right_margin = Cm(2.2)
+
+    normal = doc.styles["Normal"]
+    normal.font.name = BODY_FONT
+    normal.font.size = Pt(BODY_SIZE)
+    normal.paragraph_format.space_after = Pt(4)
+
+    title = doc.styles[STYLE_NAMES["title"]]
+    title.font.size = Pt(16)
+    title.paragraph_format.space_after = Pt(8)
+
+    heading = doc.styles[STYLE_NAMES["heading"]]
+    heading.font.size = Pt(12)
+    heading.paragraph_format.space_before = Pt(10)
+    heading.paragraph_format.space_after = Pt(2)
+
+    for kind in ("bullet", "number"):
+        doc.styles[STYLE_NAMES[kind]].paragraph_format.space_after = Pt(2)
+
+    doc.element.body.clear_content()
+    stream = BytesIO()
+    doc.save(stream)
+    style_ids = {kind: doc.styles[name].style_id for kind, name in STYLE_NAMES.items()}
+
+    base = BytesIO()
+    with zipfile.ZipFile(stream) as source, zipfile.ZipFile(base, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            if info.filename != DOCUMENT_PART:
+                target.writestr(info.filename, source.read(info))
+        document = source.read(DOCUMENT_PART).decode("utf-8")
+    # The emptied body holds only the section properties; paragraphs go in front
+    split = document.rindex("<w:sectPr")
+    return base.getvalue(), document[:split], document[split:], style_ids
+
+
+def template():
+    # (zip of the unchanged parts, document.xml before and after the body
+    # content, style ids by kind), built on first use
+    global _template
+    with _lock:
+        if _template is None:
+            _template = _build_template()
+        return _template
+
+
+def _caps_heading(text):
+    # "WORK HISTORY" is a heading; skill and credential lines like "MBA" or
+    # "SQL, AWS" are not
+    letters = [c for c in text if c.isalpha()]
+    if not letters or not text.isupper() or "," in text or ";" in text:
+        return False
+    return len(text.split()) > 1 or len(letters) > 4
+
+
+def classify(line):
+    # Returns (kind, text) for one line of generated text
+    stripped = line.strip()
+    if MARKDOWN_HEADING.match(stripped):
+        return "heading", MARKDOWN_HEADING.sub("", stripped).strip("* ")
+    # List markers win over the heading rules below ("- AWS, GCP", "1. NASA")
+    match = BULLET.match(line)
+    if match:
+        return "number" if match.group(1)[0].isdigit() else "bullet", line[match.end():].strip()
+    bold_only = stripped.startswith("**") and stripped.endswith("**") and stripped.count("**") == 2
+    if heading_kind(stripped) or (len(stripped) <= 60 and (bold_only or _caps_heading(stripped))):
+        return "heading", stripped.strip("*").strip()
+    return "body", stripped
+
+
+def _runs(text):
+    # Inline **bold** becomes bold runs
+    parts = BOLD.split(text)
+    runs = []
+    for i, part in enumerate(parts):
+        if not part:
+            continue
+        properties = "<w:rPr><w:b/></w:rPr>" if i % 2 else ""
+        runs.append(f'<w:r>{properties}<w:t xml:space="preserve">{escape(part)}</w:t></w:r>')
+    return "".join(runs)
+
+
+def _paragraph(style_id, text):
+    return f'<w:p><w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>{_runs(text)}</w:p>'
+
+
+def paragraphs_xml(text, style_ids):
+    xml = []
+    for line in XML_INVALID.sub("", text).split("\n"):
+        if not line.strip():
+            # Spacing comes from the styles
+            continue
+        kind, content = classify(line)
+        xml.append(_paragraph(style_ids[kind], content))
+    return xml
+
+
+def render_docx(adapted_resume, cover_letter):
+    base, document_head, document_tail, style_ids = template()
+    xml = [document_head, _paragraph(style_ids["title"], "Adapted Resume")]
+    xml += paragraphs_xml(adapted_resume, style_ids)
+    xml.append(PAGE_BREAK)
+    xml.append(_paragraph(style_ids["title"], "Cover Letter"))
+    xml += paragraphs_xml(cover_letter, style_ids)
+    xml.append(document_tail)
+
+    # Appending to a copy of the template zip leaves its compressed parts untouched
+    stream = BytesIO(base)
+    with zipfile.ZipFile(stream, "a", zipfile.ZIP_DEFLATED) as package:
+        package.writestr(DOCUMENT_PART, "".join(xml))
+    return stream.getvalue()
+
+
+if __name__ == "__main__":
+    # Compares with the per-line add_paragraph export used before:
+    #   python docx_export.py [lines] [rounds]
+    import sys
+    import time
+
+    def add_paragraph_per_line(adapted_resume, cover_letter):
+        doc = Document()
+        doc.add_heading("Adapted Resume", level=1)
+        for line in adapted_resume.split('\n'):
+            doc.add_paragraph(line)
+        doc.add_page_break()
+        doc.add_heading("Cover Letter", level=1)
+        for line in cover_letter.split('\n'):
+            doc.add_paragraph(line)
+        stream = BytesIO()
+        doc.save(stream)
+        return stream.getvalue()
+
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    block = [
+        "EXPERIENCE",
+        "**Senior Data Engineer**, Acme Corp (2019 - Present)",
+        "- Led a team of **five engineers** delivering a data platform used by 40 analysts",
+        "- Cut report time by 60% by moving batch jobs to incremental loads",
+        "",
+    ]
+    resume = "\n".join((block * (lines // len(block) + 1))[:lines])
+    cover_letter = "Dear Hiring Manager,\n\n" + "\n\n".join(["I would love to join your team."] * 8)
+
+    for label, fn in (("add_paragraph per line", add_paragraph_per_line), ("template + bulk XML", render_docx)):
+        fn(resume, cover_letter)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn(resume, cover_letter)
+        elapsed = (time.perf_counter() - start) / rounds
+        print(f"{label:>24}: {elapsed * 1000:8.1f} ms per document ({lines} resume lines)")
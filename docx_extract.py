@@ -0,0 +1,128 @@
+import re
+import sys
+import time
+import tracemalloc
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Reads the text of a .docx straight from its zip parts with an incremental
+# XML parser instead of building python-docx's full object model. Unlike
+# doc.paragraphs this also picks up tables, headers, footers and text boxes.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+HEADER_PART = re.compile(r"^word/header\d*\.xml$")
+FOOTER_PART = re.compile(r"^word/footer\d*\.xml$")
+DOCUMENT_PART = "word/document.xml"
+
+
+def _text_parts(names):
+    headers = sorted(n for n in names if HEADER_PART.match(n))
+    footers = sorted(n for n in names if FOOTER_PART.match(n))
+    return headers + [DOCUMENT_PART] + footers
+
+
+def iter_part_lines(stream):
+    paragraphs = []  # open paragraphs (text boxes nest a paragraph inside another)
+    rows = []
+    cells = []
+    properties_depth = 0
+    # Text boxes are stored twice (DrawingML + a VML fallback); skip the fallback
+    fallback_depth = 0
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if tag == MC_FALLBACK:
+            fallback_depth += 1 if event == "start" else -1
+            if event == "end":
+                elem.clear()
+            continue
+        if fallback_depth:
+            continue
+
+        if event == "start":
+            if tag == W + "p":
+                paragraphs.append([])
+            elif tag == W + "tr":
+                rows.append([])
+            elif tag == W + "tc":
+                cells.append([])
+            elif tag == W + "pPr":
+                properties_depth += 1
+            continue
+
+        if tag == W + "t":
+            if paragraphs:
+                paragraphs[-1].append(elem.text or "")
+        elif tag == W + "pPr":
+            properties_depth -= 1
+        elif tag == W + "tab":
+            # <w:tab/> inside paragraph properties is a tab stop, not text
+            if paragraphs and not properties_depth:
+                paragraphs[-1].append("\t")
+        elif tag in (W + "br", W + "cr"):
+            if paragraphs:
+                paragraphs[-1].append("\n")
+        elif tag == W + "p":
+            text = "".join(paragraphs.pop())
+            elem.clear()
+            if cells:
+                cells[-1].append(text)
+            else:
+                yield text
+        elif tag == W + "tc":
+            rows[-1].append(" ".join(t for t in cells.pop() if t))
+        elif tag == W + "tr":
+            line = "\t".join(rows.pop())
+            if cells:
+                cells[-1].append(line)
+            else:
+                yield line
+        elif tag == W + "tbl":
+            elem.clear()
+
+
+def iter_docx_lines(file):
+    with zipfile.ZipFile(file) as archive:
+        names = set(archive.namelist())
+        for part in _text_parts(names):
+            if part not in names:
+                continue
+            with archive.open(part) as stream:
+                yield from iter_part_lines(stream)
+
+
+def extract_docx_text(file):
+    return "\n".join(iter_docx_lines(file)).strip()
+
+
+def _python_docx_text(path):
+    from docx import Document
+
+    doc = Document(path)
+    return "\n".join(para.text for para in doc.paragraphs).strip()
+
+
+def _measure(fn, path, repeat):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        text = fn(path)
+    elapsed = (time.perf_counter() - start) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, elapsed, peak
+
+
+def benchmark(path, repeat=20):
+    results = {}
+    for name, fn in (("python-docx", _python_docx_text), ("streaming", extract_docx_text)):
+        text, elapsed, peak = _measure(fn, path, repeat)
+        results[name] = {"seconds": elapsed, "peak_bytes": peak, "chars": len(text)}
+        print(f"{name:12s} {elapsed * 1000:8.2f} ms  peak {peak / 1024:9.1f} KiB  {len(text)} chars")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else "adapted_resume_and_cover_letter.docx")
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from exports import FORMATS, cached_export, export_document, export_key
+
+# Renders every download format in the background as soon as a result is
+# available, so the buttons are ready by the time the user reaches them.
+# Each format is its own task; the bytes land in the export cache, where the
+# page picks them up on its next rerun. Threads rather than processes: the
+# renders take milliseconds and share the per-process font and template
+# caches, which a process pool would have to rebuild in every worker.
+
+MAX_WORKERS = int(os.getenv("EXPORT_WORKERS", "4"))
+# Render times kept per document for display
+TIMINGS_ENTRIES = 256
+
+
+class ExportPool:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._lock = threading.Lock()
+        self._pending = {}  # export key -> Future
+        self._errors = {}  # export key -> exception of the last failed render
+        self._seconds = OrderedDict()  # export key -> render seconds
+        self.history = {fmt: deque(maxlen=200) for fmt in FORMATS}
+
+    def submit(self, adapted_resume, cover_letter, formats=None):
+        # Starts whatever isn't cached, running or failed yet; safe to call on every rerun
+        for fmt in formats or FORMATS:
+            key = export_key(fmt, adapted_resume, cover_letter)
+            with self._lock:
+                if key in self._pending or key in self._errors:
+                    continue
+                if cached_export(fmt, adapted_resume, cover_letter) is not None:
+                    continue
+                self._pending[key] = self._executor.submit(self._render, fmt, key, adapted_resume, cover_letter)
+
+    def _render(self, fmt, key, adapted_resume, cover_letter):
+        start = time.perf_counter()
+        try:
+            export_document(fmt, adapted_resume, cover_letter)
+        except Exception as e:
+            print(f"Background {fmt} export failed: {e!r}")
+            with self._lock:
+                self._errors[key] = e
+                del self._pending[key]
+            return
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.history[fmt].append(elapsed)
+            self._seconds[key] = elapsed
+            while len(self._seconds) > TIMINGS_ENTRIES:
+                self._seconds.popitem(last=False)
+            del self._pending[key]
+
+    def status(self, fmt, adapted_resume, cover_letter):
+        # ("ready", bytes, seconds), ("pending", None, None) or ("failed", error, None)
+        key = export_key(fmt, adapted_resume, cover_letter)
+        data = cached_export(fmt, adapted_resume, cover_letter)
+        with self._lock:
+            if data is not None:
+                return "ready", data, self._seconds.get(key)
+            if key in self._errors:
+                return "failed", self._errors[key], None
+        return "pending", None, None
+
+    def retry(self, fmt, adapted_resume, cover_letter):
+        with self._lock:
+            self._errors.pop(export_key(fmt, adapted_resume, cover_letter), None)
+        self.submit(adapted_resume, cover_letter, [fmt])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "failed": len(self._errors),
+                "formats": {
+                    fmt: {
+                        "renders": len(times),
+                        "average_seconds": sum(times) / len(times) if times else 0.0,
+                        "last_seconds": times[-1] if times else None,
+                    }
+                    for fmt, times in self.history.items()
+                },
+            }
+
+
+export_pool = ExportPool()
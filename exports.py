@@ -0,0 +1,215 @@
+import html
+import threading
+import time
+from collections import OrderedDict
+
+from fpdf import FPDF
+
+from docx_export import BOLD, classify, render_docx
+from pdf_export import render_pdf
+from text_cache import content_key
+from text_normalize import normalize_text
+
+# Download files are rendered once per result (in the background, see
+# export_pool.py) and the bytes are cached under a hash of the resume and
+# cover letter text. Streamlit reruns (any click) and repeated downloads of
+# the same result reuse them.
+
+EXPORT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def create_pdf(adapted_resume, cover_letter):
+    # Core fonts only have latin-1
+    adapted_resume = normalize_text(adapted_resume)
+    cover_letter = normalize_text(cover_letter)
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    # Resume Page
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, "Adapted Resume", ln=True)
+    pdf.set_font("Arial", '', 12)
+    for line in adapted_resume.split('\n'):
+        pdf.multi_cell(0, 8, line)
+
+    # Cover Letter Page
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, "Cover Letter", ln=True)
+    pdf.set_font("Arial", '', 12)
+    for line in cover_letter.split('\n'):
+        pdf.multi_cell(0, 8, line)
+
+    # Generate PDF as bytes
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def create_unicode_pdf(adapted_resume, cover_letter):
+    # Embedded TrueType fonts when one that covers the text is installed,
+    # otherwise the core-font (latin-1 only) layout above
+    data = render_pdf(adapted_resume, cover_letter)
+    if data is None:
+        return create_pdf(adapted_resume, cover_letter)
+    return data
+
+
+def render_markdown(adapted_resume, cover_letter):
+    return (
+        f"# Adapted Resume\n\n{adapted_resume.strip()}\n\n"
+        f"# Cover Letter\n\n{cover_letter.strip()}\n"
+    ).encode("utf-8")
+
+
+HTML_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Adapted Resume &amp; Cover Letter</title>
+<style>
+body {{ font-family: Calibri, Arial, sans-serif; max-width: 46em; margin: 2em auto; line-height: 1.4; }}
+h1 {{ font-size: 1.5em; }}
+h2 {{ font-size: 1.1em; margin: 1.2em 0 0.3em; }}
+p, li {{ margin: 0.2em 0; }}
+.cover-letter {{ page-break-before: always; margin-top: 3em; }}
+</style>
+</head>
+<body>
+<section><h1>Adapted Resume</h1>
+{resume}
+</section>
+<section class="cover-letter"><h1>Cover Letter</h1>
+{cover_letter}
+</section>
+</body>
+</html>
+"""
+
+
+def _html_blocks(text):
+    # Same heading/bullet detection as the DOCX export
+    blocks = []
+    items = []
+    list_tag = None
+    for line in text.split("\n"):
+        kind, content = classify(line) if line.strip() else (None, "")
+        if kind not in ("bullet", "number") and items:
+            blocks.append(f"<{list_tag}>" + "".join(items) + f"</{list_tag}>")
+            items = []
+        if kind is None:
+            continue
+        content = BOLD.sub(r"<strong>\1</strong>", html.escape(content, quote=False))
+        if kind in ("bullet", "number"):
+            tag = "ul" if kind == "bullet" else "ol"
+            if items and tag != list_tag:
+                blocks.append(f"<{list_tag}>" + "".join(items) + f"</{list_tag}>")
+                items = []
+            list_tag = tag
+            items.append(f"<li>{content}</li>")
+        elif kind == "heading":
+            blocks.append(f"<h2>{content}</h2>")
+        else:
+            blocks.append(f"<p>{content}</p>")
+    if items:
+        blocks.append(f"<{list_tag}>" + "".join(items) + f"</{list_tag}>")
+    return "\n".join(blocks)
+
+
+def render_html(adapted_resume, cover_letter):
+    return HTML_PAGE.format(resume=_html_blocks(adapted_resume),
+                            cover_letter=_html_blocks(cover_letter)).encode("utf-8")
+
+
+class ExportFormat:
+    __slots__ = ("name", "label", "render", "mime", "file_name")
+
+    def __init__(self, name, label, render, mime, file_name):
+        self.name = name
+        self.label = label
+        self.render = render
+        self.mime = mime
+        self.file_name = file_name
+
+
+FORMATS = {
+    "docx": ExportFormat(
+        "docx", "DOCX", render_docx,
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "adapted_resume_and_cover_letter.docx",
+    ),
+    "pdf": ExportFormat("pdf", "PDF", create_unicode_pdf, "application/pdf", "adapted_resume_and_cover_letter.pdf"),
+    "md": ExportFormat("md", "Markdown", render_markdown, "text/markdown", "adapted_resume_and_cover_letter.md"),
+    "html": ExportFormat("html", "HTML", render_html, "text/html", "adapted_resume_and_cover_letter.html"),
+}
+
+
+def export_key(fmt, adapted_resume, cover_letter):
+    return content_key(f"{adapted_resume}\0{cover_letter}".encode("utf-8"), namespace=f"export:{fmt}")
+
+
+class ExportCache:
+    def __init__(self, max_bytes=EXPORT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, key):
+        # Like get, but doesn't count towards the hit rate
+        with self._lock:
+            return self._items.get(key)
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.current_bytes -= len(self._items.pop(key))
+            self._items[key] = data
+            self.current_bytes += len(data)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._items),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+export_cache = ExportCache()
+
+
+def cached_export(fmt, adapted_resume, cover_letter):
+    # The rendered bytes if this exact result was exported before, else None
+    return export_cache.peek(export_key(fmt, adapted_resume, cover_letter))
+
+
+def export_document(fmt, adapted_resume, cover_letter):
+    key = export_key(fmt, adapted_resume, cover_letter)
+    data = export_cache.get(key)
+    if data is not None:
+        return data
+    start = time.perf_counter()
+    data = FORMATS[fmt].render(adapted_resume, cover_letter)
+    print(f"Rendered {fmt} export ({len(data)} bytes) in {time.perf_counter() - start:.2f}s")
+    export_cache.put(key, data)
+    return data
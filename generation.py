@@ -0,0 +1,395 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_cache import request_key, response_cache
+from output_budget import END_MARKER, max_tokens_for, predict_output_tokens, record, until_end_marker
+from prompt_budget import count_tokens, fit_inputs_to_budget
+from providers import get_generation_provider
+from rate_scheduler import RequestCancelled, scheduler
+from refine import REFINE_MAX_TOKENS, REFINE_SYSTEM_PROMPT, apply_edits, build_refine_prompt, parse_edits
+from resume_sections import resume_prompt_text
+from single_flight import generation_flights
+
+# Tokenizer for prompt and output estimates; requests go to the backend(s)
+# configured in providers.py (LLM_PRIMARY / LLM_SECONDARY)
+MODEL = "gpt-4o-mini"
+
+SYSTEM_PROMPT = (
+    "You are an expert career coach and resume writer.\n"
+    "Adapt the candidate's resume to better fit the job description.\n"
+    "Then write a personalized cover letter highlighting relevant skills.\n"
+    "Output both clearly separated with the headings:\n"
+    "=== Adapted Resume ===\n"
+    "and\n"
+    "=== Cover Letter ==="
+)
+
+
+# Prompts for the concurrent mode, where each document is its own request
+RESUME_SYSTEM_PROMPT = (
+    "You are an expert career coach and resume writer.\n"
+    "Adapt the candidate's resume to better fit the job description.\n"
+    "Output only the adapted resume, without any heading before it."
+)
+COVER_LETTER_SYSTEM_PROMPT = (
+    "You are an expert career coach and resume writer.\n"
+    "Write a personalized cover letter for the candidate highlighting the skills most relevant to the job.\n"
+    "Output only the cover letter, without any heading before it."
+)
+# Lets generation stop as soon as the last document is complete instead of
+# running on until max_tokens
+END_INSTRUCTION = f"When you are finished, write the line\n{END_MARKER}"
+
+TASK_INSTRUCTIONS = {
+    "both": (
+        "Please provide:\n1) Adapted Resume\n2) Cover Letter\n\n"
+        "Separate them exactly using the headings:\n"
+        "=== Adapted Resume ===\n"
+        "and\n"
+        "=== Cover Letter ===\n\n"
+        + END_INSTRUCTION
+    ),
+    "resume": "Please provide the adapted resume only.\n\n" + END_INSTRUCTION,
+    "cover_letter": "Please provide the cover letter only.\n\n" + END_INSTRUCTION,
+}
+TASK_SYSTEM_PROMPTS = {
+    "both": SYSTEM_PROMPT,
+    "resume": RESUME_SYSTEM_PROMPT,
+    "cover_letter": COVER_LETTER_SYSTEM_PROMPT,
+}
+
+
+def build_user_prompt(job_desc, resume_text, creative_instructions, language, task="both"):
+    instructions = (
+        f"{creative_instructions}\n\n"
+        f"**Important:** Please provide the entire output in {language} language, regardless of the input language.\n\n"
+        + TASK_INSTRUCTIONS[task]
+    )
+    # Send only the sections worth tailoring (parsed once per unique resume text)
+    resume_text = resume_prompt_text(resume_text)
+    job_desc, resume_text, stats = fit_inputs_to_budget(
+        job_desc, resume_text, fixed_text=TASK_SYSTEM_PROMPTS[task] + instructions, model=MODEL
+    )
+    print(f"Prompt tokens: {stats['original_tokens']} -> {stats['final_tokens']} "
+          f"(saved {stats['saved_tokens']}, budget {stats['budget']})")
+    return f"Job Description:\n{job_desc}\n\nCandidate Resume:\n{resume_text}\n\n" + instructions
+
+
+def _follower_error(error):
+    # A leader that stops early (browser went away, job cancelled) raises
+    # GeneratorExit or RequestCancelled; the sessions waiting on it get
+    # RequestCancelled and run the request themselves instead
+    if isinstance(error, Exception) and not isinstance(error, RequestCancelled):
+        return error
+    return RequestCancelled("The identical request this one was waiting on was cancelled")
+
+
+def _prompt_tokens(system_prompt, user_prompt):
+    return count_tokens(system_prompt, MODEL) + count_tokens(user_prompt, MODEL)
+
+
+def stream_adapted_resume_and_cover(job_desc, resume_text, creative_instructions, language, temperature,
+                                    timings=None, use_cache=True, session_id=None, on_queue=None, cancel=None):
+    user_prompt = build_user_prompt(job_desc, resume_text, creative_instructions, language)
+    start = time.perf_counter()
+
+    sections_text = resume_prompt_text(resume_text)
+    predicted = predict_output_tokens(sections_text, MODEL)["both"]
+    max_tokens = max_tokens_for(predicted)
+    provider = get_generation_provider()
+    # Keyed on the uncorrected budget so the estimator tuning itself doesn't
+    # turn identical requests into cache misses
+    cache_max_tokens = max_tokens_for(predict_output_tokens(sections_text, MODEL, corrected=False)["both"])
+    cache_key = request_key(provider.name, SYSTEM_PROMPT, user_prompt, temperature, cache_max_tokens)
+    cached = response_cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        elapsed = time.perf_counter() - start
+        print(f"LLM response cache hit: {response_cache.stats()}")
+        if timings is not None:
+            timings.update(first_token_seconds=elapsed, total_seconds=elapsed, cached=True)
+        yield cached
+        return
+
+    # A fresh variant (use_cache=False) must not join an identical call either
+    call, leader = generation_flights.acquire(cache_key) if use_cache else (None, True)
+    while not leader:
+        print(f"Joining an identical in-flight request: {generation_flights.stats()}")
+        try:
+            output = call.wait()
+        except RequestCancelled:
+            call, leader = generation_flights.acquire(cache_key)
+            continue
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings.update(first_token_seconds=elapsed, total_seconds=elapsed, cached=False, coalesced=True)
+        yield output
+        return
+
+    first_token = None
+    parts = []
+    ticket = None
+    prompt_tokens = _prompt_tokens(SYSTEM_PROMPT, user_prompt)
+    try:
+        # Charged for the prompt plus the most it could answer; the unused
+        # part is handed back once we know the real length
+        ticket = scheduler.acquire(session_id, prompt_tokens + max_tokens, on_position=on_queue, cancel=cancel)
+        print("=== Prompt Sent to API ===")
+        print(user_prompt)
+        print("==========================")
+        start = time.perf_counter()
+        deltas = provider.stream(SYSTEM_PROMPT, user_prompt, max_tokens, temperature, stop=[END_MARKER])
+        for delta in until_end_marker(deltas):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            parts.append(delta)
+            yield delta
+    except BaseException as e:
+        if call is not None:
+            generation_flights.complete(cache_key, call, error=_follower_error(e))
+        raise
+    finally:
+        if ticket is not None:
+            scheduler.release(ticket, prompt_tokens + count_tokens("".join(parts), MODEL))
+
+    output = "".join(parts)
+    # Only completions that streamed to the end are worth replaying. Cached
+    # before the flight ends, so a caller arriving in between finds one of them
+    response_cache.put(cache_key, output)
+    if call is not None:
+        generation_flights.complete(cache_key, call, result=output)
+    record("both", predicted, max_tokens, count_tokens(output, MODEL))
+    total = time.perf_counter() - start
+    print(f"Generation timing: first token {first_token or total:.2f}s, total {total:.2f}s")
+    if timings is not None:
+        timings["first_token_seconds"] = first_token if first_token is not None else total
+        timings["total_seconds"] = total
+        timings["cached"] = False
+        timings["coalesced"] = False
+        timings["queue_seconds"] = ticket.admitted - ticket.enqueued
+
+
+def generate_adapted_resume_and_cover(job_desc, resume_text, creative_instructions, language, temperature,
+                                      timings=None, use_cache=True, session_id=None, on_queue=None, cancel=None):
+    return "".join(stream_adapted_resume_and_cover(job_desc, resume_text, creative_instructions, language,
+                                                   temperature, timings, use_cache, session_id,
+                                                   on_queue, cancel)).strip()
+
+
+def refine_adapted_resume_and_cover(adapted_resume, cover_letter, previous_instructions, creative_instructions,
+                                    previous_temperature, temperature, language, use_cache=True,
+                                    session_id=None, on_queue=None, cancel=None):
+    # Asks only for edits to the previous output (see refine.py) instead of
+    # regenerating both documents
+    document = f"=== Adapted Resume ===\n{adapted_resume}\n\n=== Cover Letter ===\n{cover_letter}"
+    user_prompt = build_refine_prompt(document, previous_instructions, creative_instructions,
+                                      previous_temperature, temperature, language)
+    provider = get_generation_provider()
+    start = time.perf_counter()
+
+    cache_key = request_key(provider.name, REFINE_SYSTEM_PROMPT, user_prompt, temperature, REFINE_MAX_TOKENS)
+    reply = response_cache.get(cache_key) if use_cache else None
+    if reply is None:
+        prompt_tokens = _prompt_tokens(REFINE_SYSTEM_PROMPT, user_prompt)
+        ticket = scheduler.acquire(session_id, prompt_tokens + REFINE_MAX_TOKENS, on_position=on_queue,
+                                   cancel=cancel)
+        reply = ""
+        try:
+            reply = provider.complete(REFINE_SYSTEM_PROMPT, user_prompt, REFINE_MAX_TOKENS, temperature)
+        finally:
+            scheduler.release(ticket, prompt_tokens + count_tokens(reply, MODEL))
+        response_cache.put(cache_key, reply)
+
+    edits = parse_edits(reply)
+    refined, applied, failed = apply_edits(document, edits)
+    if not edits and "=== Cover Letter ===" in reply:
+        # The model ignored the edit format and sent both documents again
+        refined, applied = reply.split(END_MARKER)[0], 1
+
+    stats = {
+        "output_tokens": count_tokens(reply, MODEL),
+        "edits_applied": applied,
+        "edits_failed": failed,
+        "total_seconds": time.perf_counter() - start,
+    }
+    print(f"Refine: {stats}")
+    new_resume, new_cover_letter = split_output(refined)
+    return new_resume, new_cover_letter, stats
+
+
+def split_output(output_text):
+    adapted_resume = ""
+    cover_letter = ""
+
+    if "=== Adapted Resume ===" in output_text and "=== Cover Letter ===" in output_text:
+        parts = output_text.split("=== Cover Letter ===")
+        adapted_resume = parts[0].replace("=== Adapted Resume ===", "").strip()
+        cover_letter = parts[1].strip()
+    else:
+        adapted_resume = output_text
+
+    return adapted_resume, cover_letter
+
+
+def split_partial_output(output_text):
+    # Like split_output, but for a completion that is still streaming in:
+    # everything before the cover-letter heading belongs to the resume pane
+    resume_part, _, cover_letter = output_text.partition("=== Cover Letter ===")
+    adapted_resume = resume_part.replace("=== Adapted Resume ===", "")
+    # Hide a heading that has only partly arrived ("=== Cov")
+    last_line_start = adapted_resume.rfind("\n") + 1
+    if adapted_resume[last_line_start:].lstrip().startswith("="):
+        adapted_resume = adapted_resume[:last_line_start]
+    return adapted_resume.strip(), cover_letter.strip()
+
+
+def _stream_section(provider, task, cache_key, call, leader, user_prompt, prompt_tokens, max_tokens, predicted,
+                    temperature, on_delta, timings, abort, reserve):
+    # Runs one section that missed the cache: waits on the identical call it
+    # joined, or streams it from the provider. reserve is None when the caller
+    # already holds a reservation for this section.
+    start = time.perf_counter()
+    while not leader:
+        try:
+            text = call.wait()
+        except RequestCancelled:
+            call, leader = generation_flights.acquire(cache_key)
+            continue
+        elapsed = time.perf_counter() - start
+        timings[task] = {"first_token_seconds": elapsed, "total_seconds": elapsed, "cached": False,
+                         "coalesced": True}
+        if on_delta:
+            on_delta(task, text)
+        return text.strip()
+
+    first_token = None
+    parts = []
+    ticket = None
+    system_prompt = TASK_SYSTEM_PROMPTS[task]
+    try:
+        if reserve is not None:
+            ticket = reserve(prompt_tokens + max_tokens)
+        deltas = until_end_marker(provider.stream(system_prompt, user_prompt, max_tokens, temperature,
+                                                  stop=[END_MARKER]))
+        try:
+            for delta in deltas:
+                # The other section failed: stop paying for this one
+                if abort.is_set():
+                    raise RequestCancelled(f"{task} stopped because the other section failed")
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                parts.append(delta)
+                if on_delta:
+                    on_delta(task, "".join(parts))
+        finally:
+            # Closes the backend's stream too when we stop early
+            deltas.close()
+    except BaseException as e:
+        if call is not None:
+            generation_flights.complete(cache_key, call, error=_follower_error(e))
+        raise
+    finally:
+        if ticket is not None:
+            scheduler.release(ticket, prompt_tokens + count_tokens("".join(parts), MODEL))
+
+    text = "".join(parts)
+    response_cache.put(cache_key, text)
+    if call is not None:
+        generation_flights.complete(cache_key, call, result=text)
+    record(task, predicted, max_tokens, count_tokens(text, MODEL))
+    total = time.perf_counter() - start
+    timings[task] = {"first_token_seconds": first_token if first_token is not None else total,
+                     "total_seconds": total, "cached": False, "coalesced": False}
+    return text.strip()
+
+
+def generate_concurrently(job_desc, resume_text, creative_instructions, language, temperature,
+                          on_delta=None, timings=None, use_cache=True, session_id=None, on_queue=None,
+                          cancel=None):
+    # Resume and cover letter as two independent requests in flight at once,
+    # so wall-clock time is roughly the slower of the two
+    timings = {} if timings is None else timings
+    prompts = {
+        task: build_user_prompt(job_desc, resume_text, creative_instructions, language, task)
+        for task in ("resume", "cover_letter")
+    }
+    prompt_tokens = {task: _prompt_tokens(TASK_SYSTEM_PROMPTS[task], prompts[task]) for task in prompts}
+    sections_text = resume_prompt_text(resume_text)
+    predicted = predict_output_tokens(sections_text, MODEL)
+    max_tokens = {task: max_tokens_for(predicted[task]) for task in prompts}
+    uncorrected = predict_output_tokens(sections_text, MODEL, corrected=False)
+    cache_max_tokens = {task: max_tokens_for(uncorrected[task]) for task in prompts}
+    provider = get_generation_provider()
+    start = time.perf_counter()
+
+    # Cache hits and joins of identical in-flight calls are settled first, so
+    # only the sections that will call the API take from the rate budget
+    keys = {task: request_key(provider.name, TASK_SYSTEM_PROMPTS[task], prompts[task], temperature,
+                              cache_max_tokens[task])
+            for task in prompts}
+    results = {}
+    flights = {}
+    for task in prompts:
+        cached = response_cache.get(keys[task]) if use_cache else None
+        if cached is not None:
+            elapsed = time.perf_counter() - start
+            timings[task] = {"first_token_seconds": elapsed, "total_seconds": elapsed, "cached": True}
+            if on_delta:
+                on_delta(task, cached)
+            results[task] = cached.strip()
+        else:
+            # A fresh variant (use_cache=False) must not join an identical call either
+            flights[task] = generation_flights.acquire(keys[task]) if use_cache else (None, True)
+    leaders = [task for task, (call, leader) in flights.items() if leader]
+
+    def reserve(cost):
+        return scheduler.acquire(session_id, cost, on_position=on_queue, cancel=cancel)
+
+    ticket = None
+    try:
+        # Admitted together, from this thread, so queue updates can reach the
+        # Streamlit page; the unused part is handed back at the end
+        if leaders:
+            ticket = reserve(sum(prompt_tokens[task] + max_tokens[task] for task in leaders))
+    except BaseException as e:
+        for task in leaders:
+            call = flights[task][0]
+            if call is not None:
+                generation_flights.complete(keys[task], call, error=_follower_error(e))
+        raise
+
+    abort = threading.Event()
+
+    def run(task):
+        call, leader = flights[task]
+        try:
+            # A follower whose leader gives up runs the call itself and has
+            # to reserve for it then
+            results[task] = _stream_section(provider, task, keys[task], call, leader, prompts[task],
+                                            prompt_tokens[task], max_tokens[task], predicted[task], temperature,
+                                            on_delta, timings, abort, None if leader else reserve)
+        except BaseException:
+            abort.set()
+            raise
+
+    try:
+        if flights:
+            # Provider streams are blocking, so each section gets its own thread
+            with ThreadPoolExecutor(max_workers=len(flights), thread_name_prefix="section") as pool:
+                futures = [pool.submit(run, task) for task in flights]
+            for future in futures:
+                future.result()
+    finally:
+        if ticket is not None:
+            scheduler.release(ticket, sum(
+                prompt_tokens[task] + count_tokens(results.get(task, ""), MODEL) for task in leaders
+            ))
+
+    section_timings = [timings["resume"], timings["cover_letter"]]
+    timings["first_token_seconds"] = min(t["first_token_seconds"] for t in section_timings)
+    timings["total_seconds"] = time.perf_counter() - start
+    timings["cached"] = all(t["cached"] for t in section_timings)
+    timings["queue_seconds"] = ticket.admitted - ticket.enqueued if ticket is not None else 0.0
+    print(f"Concurrent generation timing: first token {timings['first_token_seconds']:.2f}s, "
+          f"total {timings['total_seconds']:.2f}s")
+    return results["resume"], results["cover_letter"]
@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from generation import (generate_concurrently, refine_adapted_resume_and_cover, split_output, split_partial_output,
+                        stream_adapted_resume_and_cover)
+from rate_scheduler import RequestCancelled
+
+# Runs generations on a bounded pool of worker threads instead of inside the
+# Streamlit script thread. The page only keeps a job id in session_state and
+# polls it on each rerun, so the session stays responsive while the model
+# writes. Starting a new job cancels the session's previous one, and jobs
+# nobody has polled for a while (closed tab) are cancelled by a reaper
+# thread so they stop holding API capacity.
+
+MAX_WORKERS = int(os.getenv("GENERATION_WORKERS", "8"))
+# A running job whose page hasn't polled it for this long is cancelled
+ABANDON_AFTER = float(os.getenv("GENERATION_ABANDON_AFTER", "45"))
+# Finished jobs are kept this long for a page that reconnects late
+KEEP_FINISHED = float(os.getenv("GENERATION_KEEP_FINISHED", "600"))
+REAP_INTERVAL = 5.0
+
+ACTIVE = ("queued", "running")
+
+
+class Job:
+    __slots__ = ("id", "session_id", "kind", "meta", "status", "position", "parts", "partial_kind", "result",
+                 "error", "timings", "created", "last_polled", "finished", "cancel_event")
+
+    def __init__(self, session_id, kind, meta):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.kind = kind
+        self.meta = meta
+        self.status = "queued"
+        self.position = None  # place in the API capacity queue, while waiting there
+        self.parts = []  # streamed text so far
+        self.partial_kind = "combined"
+        self.result = None
+        self.error = None
+        self.timings = {}
+        self.created = time.monotonic()
+        self.last_polled = self.created
+        self.finished = None
+        self.cancel_event = threading.Event()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise RequestCancelled("Generation job was cancelled")
+
+    def set_position(self, position):
+        self.position = position
+        self.check_cancelled()
+
+    def partial(self):
+        if self.partial_kind == "combined":
+            return split_partial_output("".join(self.parts))
+        # Concurrent mode: parts holds the latest text of each section
+        sections = dict(self.parts)
+        return sections.get("resume", ""), sections.get("cover_letter", "")
+
+
+def _run_generation(job, job_desc, resume_text, creative_instructions, language, temperature, parallel,
+                    use_cache):
+    if parallel:
+        job.partial_kind = "sections"
+        sections = {}
+
+        def on_delta(task, text_so_far):
+            job.check_cancelled()
+            job.position = None
+            sections[task] = text_so_far
+            job.parts = list(sections.items())
+
+        adapted_resume, cover_letter = generate_concurrently(
+            job_desc, resume_text, creative_instructions, language, temperature, on_delta=on_delta,
+            timings=job.timings, use_cache=use_cache, session_id=job.session_id, on_queue=job.set_position,
+            cancel=job.cancel_event,
+        )
+        return {"adapted_resume": adapted_resume, "cover_letter": cover_letter}
+
+    chunks = stream_adapted_resume_and_cover(job_desc, resume_text, creative_instructions, language, temperature,
+                                             job.timings, use_cache=use_cache, session_id=job.session_id,
+                                             on_queue=job.set_position, cancel=job.cancel_event)
+    try:
+        for delta in chunks:
+            job.check_cancelled()
+            job.position = None
+            job.parts.append(delta)
+    finally:
+        # Closing the generator closes the API stream and frees the capacity it reserved
+        chunks.close()
+    adapted_resume, cover_letter = split_output("".join(job.parts).strip())
+    return {"adapted_resume": adapted_resume, "cover_letter": cover_letter}
+
+
+def _run_refine(job, adapted_resume, cover_letter, previous_instructions, creative_instructions,
+                previous_temperature, temperature, language, use_cache):
+    new_resume, new_cover_letter, stats = refine_adapted_resume_and_cover(
+        adapted_resume, cover_letter, previous_instructions, creative_instructions, previous_temperature,
+        temperature, language, use_cache=use_cache, session_id=job.session_id, on_queue=job.set_position,
+        cancel=job.cancel_event,
+    )
+    job.check_cancelled()
+    return {"adapted_resume": new_resume, "cover_letter": new_cover_letter, "refine_stats": stats}
+
+
+class JobManager:
+    def __init__(self, max_workers=MAX_WORKERS, abandon_after=ABANDON_AFTER, keep_finished=KEEP_FINISHED):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="generation")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.abandon_after = abandon_after
+        self.keep_finished = keep_finished
+        self._reaper = None
+        self.submitted = 0
+        self.cancelled = 0
+        self.abandoned = 0
+
+    def _start_reaper(self):
+        # Caller holds self._lock
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_forever, name="generation-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(REAP_INTERVAL)
+            self.reap()
+
+    def reap(self):
+        now = time.monotonic()
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.status in ACTIVE:
+                    if now - job.last_polled > self.abandon_after and not job.cancel_event.is_set():
+                        print(f"Cancelling abandoned generation job {job_id} (session {job.session_id})")
+                        job.cancel_event.set()
+                        self.abandoned += 1
+                elif now - job.finished > self.keep_finished:
+                    del self._jobs[job_id]
+
+    def _submit(self, session_id, kind, meta, runner, *args):
+        job = Job(session_id, kind, meta)
+        with self._lock:
+            # Only the newest request of a session is worth paying for
+            for other in self._jobs.values():
+                if other.session_id == session_id and other.status in ACTIVE and not other.cancel_event.is_set():
+                    other.cancel_event.set()
+                    self.cancelled += 1
+            self._jobs[job.id] = job
+            self.submitted += 1
+            self._start_reaper()
+        self._executor.submit(self._run, job, runner, args)
+        return job.id
+
+    def _run(self, job, runner, args):
+        try:
+            job.check_cancelled()
+            job.status = "running"
+            result = runner(job, *args)
+            job.check_cancelled()
+        except RequestCancelled:
+            status, result, error = "cancelled", None, None
+        except Exception as e:
+            print(f"Generation job {job.id} failed: {e!r}")
+            status, result, error = "failed", None, e
+        else:
+            status, error = "done", None
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.position = None
+            job.finished = time.monotonic()
+            job.status = status
+
+    def start_generation(self, session_id, job_desc, resume_text, creative_instructions, language, temperature,
+                         parallel=False, use_cache=True, meta=None):
+        return self._submit(session_id, "generate", meta, _run_generation, job_desc, resume_text,
+                            creative_instructions, language, temperature, parallel, use_cache)
+
+    def start_refine(self, session_id, adapted_resume, cover_letter, previous_instructions, creative_instructions,
+                     previous_temperature, temperature, language, use_cache=True, meta=None):
+        return self._submit(session_id, "refine", meta, _run_refine, adapted_resume, cover_letter,
+                            previous_instructions, creative_instructions, previous_temperature, temperature,
+                            language, use_cache)
+
+    def poll(self, job_id):
+        # Returns a snapshot of the job (or None if it is unknown or expired)
+        # and marks it as still wanted
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.last_polled = time.monotonic()
+            snapshot = {
+                "id": job.id,
+                "kind": job.kind,
+                "meta": job.meta,
+                "status": job.status,
+                "position": job.position,
+                "result": job.result,
+                "error": job.error,
+                "timings": dict(job.timings),
+                "seconds": (job.finished or time.monotonic()) - job.created,
+            }
+        if snapshot["status"] in ACTIVE:
+            snapshot["partial"] = job.partial()
+        return snapshot
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ACTIVE or job.cancel_event.is_set():
+                return False
+            job.cancel_event.set()
+            self.cancelled += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return {
+                "submitted": self.submitted,
+                "cancelled": self.cancelled,
+                "abandoned": self.abandoned,
+                "jobs": statuses,
+            }
+
+
+job_manager = JobManager()
@@ -0,0 +1,139 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+from openai import APIConnectionError, OpenAI
+
+# One place that builds the LLM clients for every entry point. Clients are
+# created once per process and reused, so HTTP connections (and their TLS
+# sessions) stay alive between requests. Retries are done here rather than in
+# the SDKs so every attempt's latency can be reported.
+
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_openai_client = None
+_hf_clients = {}
+
+# Recent attempts for anyone who wants latency numbers without parsing logs
+attempt_log = deque(maxlen=500)
+
+
+def _timeout():
+    return httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_SECONDS,
+    )
+
+
+def get_openai_client():
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            _openai_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=_timeout(),
+                max_retries=0,
+                http_client=httpx.Client(timeout=_timeout(), limits=_limits()),
+            )
+        return _openai_client
+
+
+def get_hf_client(provider="cohere"):
+    from huggingface_hub import InferenceClient
+
+    hf_api_key = os.getenv("HF_API_KEY")
+    if not hf_api_key:
+        raise ValueError("Missing Hugging Face API key. Please set the HF_API_KEY environment variable.")
+    key = (provider, hf_api_key)
+    with _lock:
+        client = _hf_clients.get(key)
+        if client is None:
+            client = InferenceClient(provider=provider, api_key=hf_api_key, timeout=READ_TIMEOUT)
+            _hf_clients[key] = client
+        return client
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error):
+    if isinstance(error, (APIConnectionError, httpx.TransportError, TimeoutError)):
+        return True
+    return _status_code(error) in RETRY_STATUS_CODES
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, error=None):
+    # Full jitter: spreads retries out so sessions hit by the same 429 burst
+    # don't all come back at the same moment
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    retry_after = _retry_after(error) if error is not None else None
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX))
+    return delay
+
+
+def _record(label, attempt, elapsed, error):
+    outcome = "ok" if error is None else f"{type(error).__name__} (status {_status_code(error)})"
+    attempt_log.append({"label": label, "attempt": attempt, "seconds": elapsed, "outcome": outcome,
+                        "time": time.time()})
+    print(f"LLM attempt {attempt}/{MAX_ATTEMPTS} {label}: {elapsed:.2f}s {outcome}")
+
+
+class CallAborted(Exception):
+    # The caller stopped wanting the result (e.g. a hedged backend that lost
+    # the race) before another attempt was made
+    pass
+
+
+def call_with_retries(fn, *args, label="llm", abort=None, **kwargs):
+    # abort: optional threading.Event, checked before every attempt and
+    # interrupting the backoff sleep, so no new paid call is started for
+    # a result nobody will read
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if abort is not None and abort.is_set():
+            raise CallAborted(f"{label} aborted before attempt {attempt}")
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            _record(label, attempt, time.perf_counter() - start, e)
+            if attempt == MAX_ATTEMPTS or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            if abort is not None:
+                abort.wait(delay)
+            else:
+                time.sleep(delay)
+            continue
+        _record(label, attempt, time.perf_counter() - start, None)
+        return result
+
@@ -1,164 +1,82 @@
-import os
+import time
+import uuid
+from functools import partial
 import streamlit as st
-from openai import OpenAI
-from io import BytesIO
-from docx import Document
-import fitz  # PyMuPDF for PDF text extraction
 import difflib
-from fpdf import FPDF
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
-def clean_text(text):
-    replacements = {
-        '\u2013': '-', '\u2014': '-',
-        '\u2018': "'", '\u2019': "'",
-        '\u201c': '"', '\u201d': '"',
-        '\u2026': '...', '\u2022': '-',  # bullet
-        '\u25cf': '-',  # ● bullet
-        '\u25a0': '-',  # ■
-        '\u25b6': '-',  # ▶
-        '\u25aa': '-',  # ▪
-        # Add more if needed
-    }
-    for k, v in replacements.items():
-        text = text.replace(k, v)
-    return text
-
-
-def create_pdf(adapted_resume, cover_letter):
-    adapted_resume = clean_text(adapted_resume)
-    cover_letter = clean_text(cover_letter)
-
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-
-    # Resume Page
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(0, 10, "Adapted Resume", ln=True)
-    pdf.set_font("Arial", '', 12)
-    for line in adapted_resume.split('\n'):
-        pdf.multi_cell(0, 8, line)
-
-    # Cover Letter Page
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(0, 10, "Cover Letter", ln=True)
-    pdf.set_font("Arial", '', 12)
-    for line in cover_letter.split('\n'):
-        pdf.multi_cell(0, 8, line)
-
-    # Generate PDF as bytes
-    pdf_bytes = pdf.output(dest='S').encode('latin-1')
-    return BytesIO(pdf_bytes)
-
-
-def create_docx(adapted_resume, cover_letter):
-    doc = Document()
-    doc.add_heading("Adapted Resume", level=1)
-    for line in adapted_resume.split('\n'):
-        doc.add_paragraph(line)
-
-    doc.add_page_break()
-
-    doc.add_heading("Cover Letter", level=1)
-    for line in cover_letter.split('\n'):
-        doc.add_paragraph(line)
-
-    # Save to in-memory BytesIO
-    doc_stream = BytesIO()
-    doc.save(doc_stream)
-    doc_stream.seek(0)
-    return doc_stream
-
-
-def extract_text_from_pdf(uploaded_file):
-    doc = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    doc.close()
-    return text
-
-
-def extract_text_from_docx(file):
-    try:
-        doc = Document(file)
-        fullText = []
-        for para in doc.paragraphs:
-            fullText.append(para.text)
-        return "\n".join(fullText).strip()
-    except Exception as e:
-        st.error(f"Error reading DOCX: {e}")
-        return None
-
-
-def extract_resume_text(uploaded_file):
-    if uploaded_file.type == "application/pdf":
-        return extract_text_from_pdf(uploaded_file)
-    elif uploaded_file.type in [
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/msword",
-    ]:
-        return extract_text_from_docx(uploaded_file)
-    else:
-        st.error("Unsupported file type. Please upload PDF or DOCX.")
-        return None
-
-
-def generate_adapted_resume_and_cover(job_desc, resume_text, creative_instructions, language, temperature):
-    system_prompt = (
-        "You are an expert career coach and resume writer.\n"
-        "Adapt the candidate's resume to better fit the job description.\n"
-        "Then write a personalized cover letter highlighting relevant skills.\n"
-        "Output both clearly separated with the headings:\n"
-        "=== Adapted Resume ===\n"
-        "and\n"
-        "=== Cover Letter ==="
-    )
-
-    user_prompt = (
-        f"Job Description:\n{job_desc}\n\nCandidate Resume:\n{resume_text}\n\n"
-        f"{creative_instructions}\n\n"
-        f"**Important:** Please provide the entire output in {language} language, regardless of the input language.\n\n"
-        "Please provide:\n1) Adapted Resume\n2) Cover Letter\n\n"
-        "Separate them exactly using the headings:\n"
-        "=== Adapted Resume ===\n"
-        "and\n"
-        "=== Cover Letter ==="
-    )
-    print("=== Prompt Sent to API ===")
-    print(user_prompt)
-    print("==========================")
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        #model="gpt-4o",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        max_tokens=3000,
-        temperature=temperature,
-    )
-    return response.choices[0].message.content.strip()
-
-
-def split_output(output_text):
-    adapted_resume = ""
-    cover_letter = ""
-
-    if "=== Adapted Resume ===" in output_text and "=== Cover Letter ===" in output_text:
-        parts = output_text.split("=== Cover Letter ===")
-        adapted_resume = parts[0].replace("=== Adapted Resume ===", "").strip()
-        cover_letter = parts[1].strip()
+from text_cache import cached_extract
+from rate_scheduler import QueueTimeout
+from resume_extract import EXTRACTOR_VERSION, RESUME_TOKEN_BUDGET, extract_resume_text
+from generation_jobs import job_manager
+from exports import FORMATS
+from export_pool import export_pool
+
+# How often the page re-checks a running generation job
+JOB_POLL_INTERVAL = 0.5
+# How often the page re-checks download files still being rendered
+EXPORT_POLL_INTERVAL = 0.3
+
+
+def session_id():
+    return st.session_state.setdefault("session_id", uuid.uuid4().hex)
+
+
+def show_generation_job():
+    # Shows the running job's progress without blocking the page: each rerun
+    # renders a snapshot, then schedules the next rerun. Finished results are
+    # moved into session_state.
+    job_id = st.session_state.get("generation_job")
+    if not job_id:
+        return
+    job = job_manager.poll(job_id)
+    if job is None:
+        st.session_state.pop("generation_job", None)
+        return
+
+    if job["status"] in ("queued", "running"):
+        if job["position"]:
+            st.info(f"Lots of people are generating right now. You are #{job['position']} in line, "
+                    "your request will start automatically.")
+        label = "Refining" if job["kind"] == "refine" else "Generating"
+        st.caption(f"{label}... {job['seconds']:.0f}s")
+        if st.button("✖️ Cancel"):
+            job_manager.cancel(job_id)
+            st.rerun()
+        if job["kind"] == "generate":
+            adapted_resume, cover_letter = job["partial"]
+            st.markdown("**Adapted Resume**")
+            st.markdown(adapted_resume)
+            st.markdown("**Cover Letter**")
+            st.markdown(cover_letter)
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+    st.session_state.pop("generation_job", None)
+    if job["status"] == "cancelled":
+        st.info("Generation cancelled.")
+    elif job["status"] == "failed":
+        if isinstance(job["error"], QueueTimeout):
+            st.error("The service is too busy right now. Please try again in a minute.")
+        else:
+            st.error(f"Generation failed: {job['error']}")
     else:
-        adapted_resume = output_text
-
-    return adapted_resume, cover_letter
+        result = job["result"]
+        if job["kind"] == "refine":
+            old_resume = st.session_state["adapted_resume"]
+            old_cover_letter = st.session_state["cover_letter"]
+            st.session_state["refine_changes"] = (result["refine_stats"], "".join(difflib.unified_diff(
+                (old_resume + "\n\n" + old_cover_letter).splitlines(keepends=True),
+                (result["adapted_resume"] + "\n\n" + result["cover_letter"]).splitlines(keepends=True),
+                "before", "after", n=1,
+            )))
+            st.session_state["generation_timings"] = {}
+        else:
+            st.session_state.pop("refine_changes", None)
+            st.session_state["generation_timings"] = job["timings"]
+        st.session_state["adapted_resume"] = result["adapted_resume"]
+        st.session_state["cover_letter"] = result["cover_letter"]
+        st.session_state["generation_inputs"] = job["meta"]
+        # Start building every download format right away
+        export_pool.submit(result["adapted_resume"], result["cover_letter"])
 
 
 PASSWORD = "two_cats"
@@ -338,39 +256,111 @@ def main():
     uploaded_file = st.file_uploader("", type=["pdf", "docx"])
 
     if uploaded_file:
-        resume_text = extract_resume_text(uploaded_file)
+        # Only as much text as the prompt can use; the budget is part of the cache key
+        resume_text = cached_extract(
+            uploaded_file, partial(extract_resume_text, max_tokens=RESUME_TOKEN_BUDGET),
+            namespace=f"{uploaded_file.type}:resume_extract-v{EXTRACTOR_VERSION}:dedupe:{RESUME_TOKEN_BUDGET}",
+        )
         if resume_text:
             st.markdown("Extracted Resume Text Preview")
             st.text_area("Resume Text", resume_text[:8000], height=100)
 
+            current_inputs = {
+                "job_desc": job_desc,
+                "resume_text": resume_text,
+                "creative_instructions": creative_instructions,
+                "temperature": temperature,
+                "language": language,
+            }
+            fresh_variant = st.checkbox(
+                "Generate a fresh variant",
+                help="By default identical requests reuse the previous result. Tick this to ask the model again."
+            )
+            write_in_parallel = st.checkbox(
+                "Write resume and cover letter in parallel (faster)",
+                help="Sends two separate requests at the same time instead of one combined request."
+            )
             if st.button("🔔 6. Generate Adapted Resume & Cover Letter"):
-                with st.spinner("Generating..."):
-                    output = generate_adapted_resume_and_cover(job_desc, resume_text, creative_instructions, language,
-                                                               temperature)
-                    adapted_resume, cover_letter = split_output(output)
+                # Replaces (and cancels) any job this session still has running
+                st.session_state["generation_job"] = job_manager.start_generation(
+                    session_id(), job_desc, resume_text, creative_instructions, language, temperature,
+                    parallel=write_in_parallel, use_cache=not fresh_variant, meta=current_inputs,
+                )
+
+            previous_inputs = st.session_state.get("generation_inputs")
+            # Refining only makes sense while the job, resume and language are unchanged
+            can_refine = (
+                previous_inputs is not None
+                and "adapted_resume" in st.session_state
+                and all(previous_inputs[k] == current_inputs[k] for k in ("job_desc", "resume_text", "language"))
+                and previous_inputs != current_inputs
+            )
+            if can_refine and st.button("✏️ Apply the changed enhancements to the current result (much faster)"):
+                st.session_state["generation_job"] = job_manager.start_refine(
+                    session_id(), st.session_state["adapted_resume"], st.session_state["cover_letter"],
+                    previous_inputs["creative_instructions"], creative_instructions,
+                    previous_inputs["temperature"], temperature, language,
+                    use_cache=not fresh_variant, meta=current_inputs,
+                )
 
-                st.session_state["adapted_resume"] = adapted_resume
-                st.session_state["cover_letter"] = cover_letter
+    show_generation_job()
 
     if "adapted_resume" in st.session_state and "cover_letter" in st.session_state:
         st.subheader("******* 👍👍 Results 👍👍 *******")
+        timings = st.session_state.get("generation_timings")
+        if timings and timings.get("cached"):
+            st.caption("Reused the result of an identical earlier request.")
+        elif timings and timings.get("coalesced"):
+            st.caption("Shared the result of an identical request that was already running.")
+        elif timings:
+            st.caption(f"First words after {timings['first_token_seconds']:.1f}s, "
+                       f"complete after {timings['total_seconds']:.1f}s")
+        if "refine_changes" in st.session_state:
+            stats, changes = st.session_state["refine_changes"]
+            st.caption(f"Refined with {stats['edits_applied']} edit(s) in {stats['total_seconds']:.1f}s"
+                       + (f", {stats['edits_failed']} could not be applied" if stats["edits_failed"] else ""))
+            with st.expander("What changed"):
+                st.code(changes or "No changes", language="diff")
         st.subheader("Suggested Resume (check carefully for accuracy!)")
         st.text_area("", st.session_state["adapted_resume"], height=600)
 
         st.subheader("Cover Letter (check carefully for accuracy!)")
         st.text_area("", st.session_state["cover_letter"], height=600)
 
-        docx_file = create_docx(st.session_state["adapted_resume"], st.session_state["cover_letter"])
-        pdf_file = create_pdf(st.session_state["adapted_resume"], st.session_state["cover_letter"])
-
-        st.download_button(
-            label="Download Adapted Resume & Cover Letter as DOCX",
-            data=docx_file,
-            file_name="adapted_resume_and_cover_letter.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
+        # Every format is rendered in the background; each download button
+        # shows up as soon as its file is ready
+        adapted_resume = st.session_state["adapted_resume"]
+        cover_letter = st.session_state["cover_letter"]
+        export_pool.submit(adapted_resume, cover_letter)
+        pending = False
+        for fmt in FORMATS.values():
+            status, data, seconds = export_pool.status(fmt.name, adapted_resume, cover_letter)
+            if status == "ready":
+                st.download_button(
+                    label=f"Download Adapted Resume & Cover Letter as {fmt.label}",
+                    data=data,
+                    file_name=fmt.file_name,
+                    mime=fmt.mime,
+                    key=f"download_{fmt.name}",
+                )
+                if seconds is not None:
+                    st.caption(f"{fmt.label} built in {seconds:.2f}s")
+            elif status == "failed":
+                st.warning(f"Could not build the {fmt.label} file: {data}")
+                if st.button(f"Retry {fmt.label}", key=f"retry_{fmt.name}"):
+                    export_pool.retry(fmt.name, adapted_resume, cover_letter)
+                    st.rerun()
+            else:
+                pending = True
+                st.caption(f"Preparing {fmt.label} download...")
+        if pending:
+            time.sleep(EXPORT_POLL_INTERVAL)
+            st.rerun()
 
     else:
         st.info("Please upload a resume and enter job description to start.")
 
-main()
\ No newline at end of file
+# Pool workers (pdf_extract.py) re-import this script as __mp_main__; only
+# Streamlit's run, as __main__, draws the page
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+
+from prompt_budget import count_tokens
+from resume_sections import parse_resume
+
+# Predicts how long the answer will be from the size and structure of the
+# resume, so max_tokens (and the rate-limit capacity the scheduler reserves)
+# follows the input instead of a fixed 3000. Every request logs predicted vs.
+# actual output tokens; a running correction factor per kind of output
+# ("resume", "cover_letter", or "both" for the combined request) keeps the
+# estimate honest between re-tunings of the coefficients below.
+
+MIN_OUTPUT_TOKENS = 600
+MAX_OUTPUT_TOKENS = 3000
+# Adapted resumes come out about as long as the input resume, plus a little per job entry
+RESUME_TOKEN_RATIO = 1.05
+TOKENS_PER_ENTRY = 25
+COVER_LETTER_TOKENS = 450
+# Headroom on top of the prediction before the model gets cut off
+HEADROOM = 1.3
+
+END_MARKER = "=== End ==="
+
+LOG_PATH = os.getenv(
+    "OUTPUT_BUDGET_LOG",
+    os.path.join(os.path.expanduser("~"), ".cache", "resume_tailor", "output_tokens.jsonl"),
+)
+
+_lock = threading.Lock()
+_corrections = {"resume": 1.0, "cover_letter": 1.0, "both": 1.0}
+# Weight of the newest observation in the running correction factor
+CORRECTION_SMOOTHING = 0.1
+
+
+def predict_output_tokens(resume_text, model="gpt-4o-mini", corrected=True):
+    index = parse_resume(resume_text)
+    resume_tokens = count_tokens(resume_text, model)
+    resume = resume_tokens * RESUME_TOKEN_RATIO + TOKENS_PER_ENTRY * len(index.experience)
+    with _lock:
+        corrections = dict(_corrections) if corrected else dict.fromkeys(_corrections, 1.0)
+    return {
+        "resume": int(resume * corrections["resume"]),
+        "cover_letter": int(COVER_LETTER_TOKENS * corrections["cover_letter"]),
+        "both": int((resume + COVER_LETTER_TOKENS) * corrections["both"]),
+    }
+
+
+def corrections():
+    with _lock:
+        return dict(_corrections)
+
+
+def max_tokens_for(predicted):
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, int(predicted * HEADROOM)))
+
+
+def record(kind, predicted, max_tokens, actual):
+    # predicted is the corrected estimate the request was sized with
+    hit_limit = actual >= max_tokens * 0.98
+    with _lock:
+        correction = _corrections.get(kind, 1.0)
+        # Answers cut off by max_tokens only tell us the prediction was too
+        # low, not by how much, so they don't move the correction
+        if predicted and not hit_limit:
+            # Compared with the uncorrected estimate; against the corrected
+            # one the factor would only converge to the square root of the
+            # true ratio
+            ratio = actual * correction / predicted
+            correction = (1 - CORRECTION_SMOOTHING) * correction + CORRECTION_SMOOTHING * ratio
+            _corrections[kind] = correction
+    entry = {
+        "time": time.time(),
+        "kind": kind,
+        "predicted_tokens": predicted,
+        "max_tokens": max_tokens,
+        "actual_tokens": actual,
+        "hit_limit": hit_limit,
+        "correction": round(correction, 4),
+    }
+    print(f"Output tokens: predicted {predicted}, actual {actual}, max {max_tokens}"
+          + (" (hit limit)" if hit_limit else ""))
+    try:
+        os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Could not write output budget log: {e}")
+    return entry
+
+
+def _cut_at_marker(pending, marker):
+    # Returns (text safe to pass on, text to hold back, marker found)
+    index = pending.find(marker)
+    if index != -1:
+        return pending[:index], "", True
+    safe = max(len(pending) - (len(marker) - 1), 0)
+    return pending[:safe], pending[safe:], False
+
+
+def until_end_marker(deltas, marker=END_MARKER):
+    # Passes text through until the end marker shows up, holding back just
+    # enough characters that a marker split across chunks is never leaked.
+    # Closing the source on return stops the underlying API stream.
+    pending = ""
+    try:
+        for delta in deltas:
+            text, pending, found = _cut_at_marker(pending + delta, marker)
+            if text:
+                yield text
+            if found:
+                return
+        if pending:
+            yield pending
+    finally:
+        close = getattr(deltas, "close", None)
+        if close is not None:
+            close()
+
@@ -0,0 +1,299 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+
+from fpdf import FPDF
+from fpdf import fpdf as fpdf_module
+from fpdf.ttfonts import TTFontFile
+
+# PDF export with embedded TrueType fonts, so output in any language the font
+# covers survives instead of being squeezed through latin-1. Parsing a TTF and
+# cutting the embedded subset are pure Python and slow, so both are done once
+# per process: parsed metrics are cached per font file, and subsets per
+# (font, character set). Every subset includes the whole Latin-1 range, which
+# makes most documents share one cached subset.
+
+FONT_DIRS = [d for d in os.getenv("PDF_FONT_DIRS", "").split(os.pathsep) if d] + [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts"),
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/truetype/noto",
+    "/usr/share/fonts/truetype/liberation",
+    "/usr/share/fonts/truetype/droid",
+    "/usr/share/fonts/TTF",
+    "/Library/Fonts",
+    "C:\\Windows\\Fonts",
+]
+# (regular, bold) TrueType files, in order of preference. A document uses the
+# first family with a glyph for every character it contains. Only glyf-based
+# .ttf files work here (no .otf/.ttc).
+FONT_FAMILIES = [
+    ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf"),
+    ("NotoSans-Regular.ttf", "NotoSans-Bold.ttf"),
+    ("LiberationSans-Regular.ttf", "LiberationSans-Bold.ttf"),
+    ("DroidSansFallbackFull.ttf", None),
+    ("arialuni.ttf", None),
+]
+
+BASE_SUBSET = frozenset(range(0, 256))
+SUBSET_CACHE_ENTRIES = 32
+
+_lock = threading.Lock()
+_font_metrics = {}
+_subsets = OrderedDict()
+subset_stats = {"hits": 0, "misses": 0}
+
+
+def find_font(file_name):
+    if file_name is None:
+        return None
+    if os.path.isabs(file_name):
+        return file_name if os.path.exists(file_name) else None
+    for directory in FONT_DIRS:
+        path = os.path.join(directory, file_name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_font(path):
+    # The same dict fpdf's add_font(uni=True) builds, minus its pickle files
+    # next to the font (system font directories are usually read-only)
+    with _lock:
+        font = _font_metrics.get(path)
+        if font is not None:
+            return font
+        ttf = TTFontFile()
+        ttf.getMetrics(path)
+        font = {
+            "name": re.sub("[ ()]", "", ttf.fullName),
+            "desc": {
+                "Ascent": int(round(ttf.ascent, 0)),
+                "Descent": int(round(ttf.descent, 0)),
+                "CapHeight": int(round(ttf.capHeight, 0)),
+                "Flags": ttf.flags,
+                "FontBBox": "[%s %s %s %s]" % tuple(int(round(b, 0)) for b in ttf.bbox),
+                "ItalicAngle": int(ttf.italicAngle),
+                "StemV": int(round(ttf.stemV, 0)),
+                "MissingWidth": int(round(ttf.defaultWidth, 0)),
+            },
+            "up": round(ttf.underlinePosition),
+            "ut": round(ttf.underlineThickness),
+            "cw": ttf.charWidths,
+            "ttffile": path,
+        }
+        _font_metrics[path] = font
+        return font
+
+
+class CachedSubsetTTFontFile(TTFontFile):
+    def makeSubset(self, file, subset):
+        key = (file, tuple(subset))
+        with _lock:
+            cached = _subsets.get(key)
+            if cached is not None:
+                _subsets.move_to_end(key)
+                subset_stats["hits"] += 1
+        if cached is None:
+            stream = TTFontFile.makeSubset(self, file, subset)
+            cached = (stream, dict(self.codeToGlyph), self.maxUni)
+            with _lock:
+                subset_stats["misses"] += 1
+                _subsets[key] = cached
+                while len(_subsets) > SUBSET_CACHE_ENTRIES:
+                    _subsets.popitem(last=False)
+        stream, code_to_glyph, self.maxUni = cached
+        # fpdf reads these back after makeSubset
+        self.codeToGlyph = dict(code_to_glyph)
+        return stream
+
+
+# FPDF._putfonts looks TTFontFile up as a module global. The cached subclass
+# returns exactly what the original would, so it is swapped in process-wide.
+fpdf_module.TTFontFile = CachedSubsetTTFontFile
+
+
+def _covers(font, text):
+    cw = font["cw"]
+    for char in set(text):
+        code = ord(char)
+        if code < 256 or unicodedata.category(char)[0] in "CZM":
+            continue
+        if code >= len(cw) or not cw[code]:
+            return False
+    return True
+
+
+def pick_font_family(text):
+    # Returns (regular path, bold path) of the first installed family that can
+    # draw every character of text, or None
+    for regular, bold in FONT_FAMILIES:
+        regular_path = find_font(regular)
+        if regular_path is None:
+            continue
+        if _covers(load_font(regular_path), text):
+            return regular_path, find_font(bold) or regular_path
+    return None
+
+
+class UnicodePDF(FPDF):
+    def add_cached_font(self, family, style, path):
+        fontkey = family.lower() + style.upper()
+        if fontkey in self.fonts:
+            return
+        font = load_font(path)
+        self.fonts[fontkey] = {
+            "i": len(self.fonts) + 1, "type": "TTF",
+            "name": font["name"], "desc": font["desc"],
+            "up": font["up"], "ut": font["ut"],
+            "cw": font["cw"],  # shared across documents, fpdf only reads it
+            "ttffile": path, "fontkey": fontkey,
+            "subset": list(range(0, 32)), "unifilename": None,
+        }
+
+    def get_string_width(self, s):
+        # multi_cell measures text one character at a time through this, so
+        # it is the hot path of layout; same result as FPDF's, less overhead
+        if not self.unifontsubset:
+            return FPDF.get_string_width(self, s)
+        cw = self.current_font["cw"]
+        size = len(cw)
+        missing = self.current_font["desc"]["MissingWidth"] or 500
+        if len(s) == 1:
+            code = ord(s)
+            return (cw[code] if code < size else missing) * self.font_size / 1000.0
+        return sum(cw[code] if code < size else missing for code in map(ord, s)) * self.font_size / 1000.0
+
+    def _reset_word_spacing(self):
+        if self.ws > 0:
+            self.ws = 0
+            self._out("0 Tw")
+
+    def multi_cell(self, w, h, txt="", border=0, align="J", fill=0, split_only=False):
+        # Same line breaks and output as FPDF.multi_cell, but found per line
+        # with prefix sums of the glyph widths instead of a method call per
+        # character
+        if not self.unifontsubset or border or split_only:
+            return FPDF.multi_cell(self, w, h, txt, border, align, fill, split_only)
+        cw = self.current_font["cw"]
+        size = len(cw)
+        missing = self.current_font["desc"]["MissingWidth"] or 500
+        if w == 0:
+            w = self.w - self.r_margin - self.x
+        wmax = (w - 2 * self.c_margin) * 1000.0 / self.font_size
+        s = txt.replace("\r", "")
+        if s.endswith("\n"):
+            s = s[:-1]
+        for line in s.split("\n"):
+            widths = list(accumulate((cw[code] if code < size else missing for code in map(ord, line)), initial=0))
+            j = 0
+            while True:
+                # First character that no longer fits on the line starting at j
+                i = bisect_right(widths, widths[j] + wmax) - 1
+                if i >= len(line):
+                    break
+                sep = line.rfind(" ", j, i + 1)
+                if sep == -1:
+                    if i == j:
+                        i += 1
+                    self._reset_word_spacing()
+                    self.cell(w, h, line[j:i], 0, 2, align, fill)
+                    j = i
+                    continue
+                if align == "J":
+                    spaces = line.count(" ", j, sep + 1)
+                    if spaces > 1:
+                        self.ws = (wmax - (widths[sep] - widths[j])) / 1000.0 * self.font_size / (spaces - 1)
+                    else:
+                        self.ws = 0
+                    self._out("%.3f Tw" % (self.ws * self.k))
+                self.cell(w, h, line[j:sep], 0, 2, align, fill)
+                j = sep + 1
+            self._reset_word_spacing()
+            self.cell(w, h, line[j:], 0, 2, align, fill)
+        self.x = self.l_margin
+        return []
+
+    def _putfonts(self):
+        # Used characters are appended once per occurrence; dedupe them and
+        # pad to the shared base set so the subset cache gets hits
+        for font in self.fonts.values():
+            if font.get("type") == "TTF":
+                font["subset"] = sorted(BASE_SUBSET.union(font["subset"]))
+        FPDF._putfonts(self)
+
+
+def build_pdf(adapted_resume, cover_letter):
+    family = pick_font_family(adapted_resume + cover_letter)
+    if family is None:
+        return None
+    regular, bold = family
+    pdf = UnicodePDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_cached_font("body", "", regular)
+    pdf.add_cached_font("body", "B", bold)
+    for title, text in (("Adapted Resume", adapted_resume), ("Cover Letter", cover_letter)):
+        pdf.add_page()
+        pdf.set_font("body", "B", 16)
+        pdf.cell(0, 10, title, ln=True)
+        pdf.set_font("body", "", 12)
+        # One call per paragraph instead of per line; multi_cell breaks on
+        # the newlines inside it, the blank line between is added here
+        for i, paragraph in enumerate(text.split("\n\n")):
+            if i:
+                pdf.ln(8)
+            pdf.multi_cell(0, 8, paragraph)
+    return pdf
+
+
+def render_pdf(adapted_resume, cover_letter):
+    # PDF bytes, or None when no installed font covers the text
+    pdf = build_pdf(adapted_resume, cover_letter)
+    if pdf is None:
+        return None
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def stats():
+    with _lock:
+        return {"fonts_loaded": len(_font_metrics), "subsets_cached": len(_subsets), **subset_stats}
+
+
+if __name__ == "__main__":
+    # Throughput of this renderer against the core-font path in exports.py:
+    #   python pdf_export.py [pages] [rounds]
+    import sys
+
+    # Run as a script this file is __main__; exports imports it again as
+    # pdf_export, and that copy owns the font caches fpdf is patched with
+    import pdf_export
+    from exports import create_pdf
+
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    line = "- Led a team of five engineers to deliver a data platform used by 40 analysts, cutting report time by 60%."
+    paragraph = "\n".join([line] * 6)
+    # About 3 paragraphs per page at 12pt
+    resume = "\n\n".join([paragraph] * (3 * pages))
+    cover_letter = "Dear Hiring Manager,\n\n" + "\n\n".join([paragraph] * 3) + "\n\nKind regards,\nJane Doe"
+    page_count = len(re.findall(rb"/Type /Page\b(?!s)", create_pdf(resume, cover_letter)))
+
+    def bench(label, fn):
+        fn(resume, cover_letter)  # warm-up: font parsing and subsetting are one-off costs
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn(resume, cover_letter)
+        elapsed = (time.perf_counter() - start) / rounds
+        print(f"{label:>22}: {elapsed * 1000:8.1f} ms/document, {page_count / elapsed:8.1f} pages/sec")
+
+    print(f"{page_count} pages per document, {rounds} rounds")
+    bench("core font, per line", create_pdf)
+    if pdf_export.pick_font_family(resume) is None:
+        print("No TrueType font found; set PDF_FONT_DIRS to a directory with e.g. DejaVuSans.ttf")
+    else:
+        bench("TrueType, cached", pdf_export.render_pdf)
+        print(f"Font cache: {pdf_export.stats()}")
@@ -0,0 +1,221 @@
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF for PDF text extraction
+
+# Rough chars-per-token ratio for English prose, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Below this many pages a process pool costs more than it saves
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "24"))
+PARALLEL_MAX_WORKERS = int(os.getenv("PDF_PARALLEL_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+# A pooled extraction taking longer than this falls back to the serial path
+PARALLEL_TIMEOUT = float(os.getenv("PDF_PARALLEL_TIMEOUT", "60"))
+
+# Repeated blocks only count as header/footer if they sit in this top/bottom
+# fraction of the page and show up on at least this share of pages
+MARGIN_BAND = 0.2
+REPEAT_PAGE_RATIO = 0.5
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def open_pdf(data):
+    try:
+        return fitz.open(stream=data, filetype="pdf")
+    except TypeError:
+        # Older PyMuPDF builds only take bytes/bytearray streams
+        return fitz.open(stream=bytes(data), filetype="pdf")
+
+
+def iter_page_texts(doc, start=0, stop=None):
+    # Pages are loaded one at a time so a consumer that stops early never
+    # pays for the remaining pages
+    if stop is None or stop > doc.page_count:
+        stop = doc.page_count
+    for page_number in range(start, stop):
+        yield doc.load_page(page_number).get_text()
+
+
+def iter_within_budget(page_texts, max_chars=None, max_tokens=None):
+    if max_tokens is not None:
+        token_chars = max_tokens * CHARS_PER_TOKEN
+        max_chars = token_chars if max_chars is None else min(max_chars, token_chars)
+
+    remaining = max_chars
+    for text in page_texts:
+        if remaining is not None:
+            if remaining <= 0:
+                return
+            if len(text) >= remaining:
+                yield text[:remaining]
+                return
+            remaining -= len(text)
+        yield text
+
+
+def _normalize_block(text):
+    # Page numbers and dates differ per page, so digits are folded together
+    text = re.sub(r"\d+", "#", text.lower())
+    return " ".join(text.split())
+
+
+def _page_text_blocks(page, clip=None):
+    height = page.rect.height or 1
+    for x0, y0, x1, y1, text, block_no, block_type in page.get_text("blocks", clip=clip):
+        if block_type != 0:  # images
+            continue
+        in_margin = y1 <= height * MARGIN_BAND or y0 >= height * (1 - MARGIN_BAND)
+        yield text, in_margin
+
+
+def _margin_keys(page):
+    # Normalized blocks in the top and bottom bands only; the page body is
+    # never laid out here
+    rect = page.rect
+    bands = (
+        fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * MARGIN_BAND),
+        fitz.Rect(rect.x0, rect.y1 - rect.height * MARGIN_BAND, rect.x1, rect.y1),
+    )
+    return {_normalize_block(text) for band in bands for text, in_margin in _page_text_blocks(page, band) if in_margin}
+
+
+def repeated_margin_blocks(doc):
+    # Frequency index: normalized margin block -> first page it appears on,
+    # for blocks found on enough pages to be a running header/footer
+    page_frequency = Counter()
+    first_page = {}
+    for page_number in range(doc.page_count):
+        keys = _margin_keys(doc.load_page(page_number))
+        page_frequency.update(keys)
+        for key in keys:
+            first_page.setdefault(key, page_number)
+    min_pages = max(2, math.ceil(doc.page_count * REPEAT_PAGE_RATIO))
+    return {key: first_page[key] for key, count in page_frequency.items() if key and count >= min_pages}
+
+
+def _deduped_page_text(page, page_number, repeated):
+    kept = []
+    seen = set()
+    for text, in_margin in _page_text_blocks(page):
+        key = _normalize_block(text) if in_margin else None
+        if key in repeated:
+            # Keep the first copy: on page one the name/contact line is real content
+            if repeated[key] != page_number or key in seen:
+                continue
+            seen.add(key)
+        kept.append(text if text.endswith("\n") else text + "\n")
+    return "".join(kept)
+
+
+def iter_deduped_page_texts(doc, repeated=None, start=0, stop=None):
+    # Like iter_page_texts: page bodies are only laid out as they are consumed
+    if repeated is None:
+        repeated = repeated_margin_blocks(doc)
+    if stop is None or stop > doc.page_count:
+        stop = doc.page_count
+    for page_number in range(start, stop):
+        yield _deduped_page_text(doc.load_page(page_number), page_number, repeated)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # The app server runs generation, export and reaper threads, and
+            # forking a multi-threaded process isn't safe: workers come from
+            # a forkserver (spawn where that doesn't exist)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=PARALLEL_MAX_WORKERS, mp_context=context)
+        return _pool
+
+
+def _discard_pool(pool):
+    # A worker died (OOM kill, MuPDF crash on a bad file) or hung: the next
+    # extraction gets a fresh pool instead of BrokenProcessPool forever
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page_range(data, start, stop, repeated=None):
+    # Runs in a worker process: every worker opens its own copy of the same bytes
+    doc = open_pdf(data)
+    try:
+        if repeated is not None:
+            return "".join(iter_deduped_page_texts(doc, repeated, start, stop))
+        return "".join(iter_page_texts(doc, start, stop))
+    finally:
+        doc.close()
+
+
+def _page_ranges(page_count, shards):
+    size, extra = divmod(page_count, shards)
+    start = 0
+    for shard in range(shards):
+        stop = start + size + (1 if shard < extra else 0)
+        yield start, stop
+        start = stop
+
+
+def extract_pdf_text_parallel(data, page_count, max_workers=None, repeated=None, timeout=PARALLEL_TIMEOUT):
+    # Raises BrokenProcessPool or concurrent.futures.TimeoutError after
+    # replacing the pool; extract_pdf_text falls back to the serial path
+    shards = min(max_workers or PARALLEL_MAX_WORKERS, page_count)
+    if not isinstance(data, bytes):
+        # memoryviews/mmaps can't be pickled to worker processes
+        data = bytes(data)
+    ranges = list(_page_ranges(page_count, shards))
+    pool = _get_pool()
+    deadline = time.monotonic() + timeout
+    try:
+        futures = [pool.submit(_extract_page_range, data, start, stop, repeated) for start, stop in ranges]
+        # Futures are kept in submission order, so the merge is in page order
+        return "".join(future.result(timeout=max(deadline - time.monotonic(), 0)) for future in futures)
+    except (BrokenProcessPool, FutureTimeout):
+        _discard_pool(pool)
+        raise
+
+
+def _extract_serial(doc, repeated, max_chars=None, max_tokens=None):
+    texts = iter_page_texts(doc) if repeated is None else iter_deduped_page_texts(doc, repeated)
+    return "".join(iter_within_budget(texts, max_chars, max_tokens))
+
+
+def extract_pdf_text(data, max_chars=None, max_tokens=None, parallel=False,
+                     threshold=PARALLEL_PAGE_THRESHOLD, dedupe=False):
+    doc = open_pdf(data)
+    try:
+        # Header/footer detection only reads the margin bands of every page;
+        # the bodies below are still streamed (budget) or sharded (pool)
+        repeated = repeated_margin_blocks(doc) if dedupe else None
+
+        # A budget means we want to stop early, which only the serial path can do
+        use_pool = (
+            parallel
+            and max_chars is None
+            and max_tokens is None
+            and PARALLEL_MAX_WORKERS > 1
+            and doc.page_count >= threshold
+        )
+        if use_pool:
+            try:
+                return extract_pdf_text_parallel(data, doc.page_count, repeated=repeated)
+            except (BrokenProcessPool, FutureTimeout) as e:
+                print(f"Parallel PDF extraction failed ({type(e).__name__}), extracting serially")
+        return _extract_serial(doc, repeated, max_chars, max_tokens)
+    finally:
+        doc.close()
@@ -0,0 +1,141 @@
+import os
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+# Budget for everything we send to the model (system + user prompt)
+INPUT_TOKEN_BUDGET = int(os.getenv("PROMPT_INPUT_TOKEN_BUDGET", "6000"))
+CHARS_PER_TOKEN = 4
+# When both inputs still don't fit after dropping paragraphs, each side keeps
+# at least this share of the budget (or all of its text, if that's less)
+MIN_SIDE_SHARE = 0.25
+
+# Job-ad paragraphs that rarely help tailor a resume
+BOILERPLATE_PATTERNS = re.compile(
+    r"equal opportunity|without regard to|reasonable accommodation|privacy (policy|notice)|"
+    r"benefits include|we offer|about us|cookie|apply now|click here|all rights reserved",
+    re.IGNORECASE,
+)
+WORD = re.compile(r"[a-z][a-z0-9+#.]{2,}")
+STOPWORDS = {
+    "the", "and", "for", "with", "you", "our", "are", "will", "your", "this", "that", "have",
+    "from", "who", "all", "can", "has", "not", "but", "their", "they", "about", "what", "was",
+}
+
+_encodings = {}
+
+
+def count_tokens(text, model="gpt-4o-mini"):
+    if tiktoken is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    encoding = _encodings.get(model)
+    if encoding is None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        _encodings[model] = encoding
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def clean_prompt_text(text):
+    # Re-join words hyphenated across PDF line breaks ("manage-\nment")
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t\u00a0]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def _keywords(text):
+    return {w for w in WORD.findall(text.lower()) if w not in STOPWORDS}
+
+
+def _paragraphs(text):
+    return [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+
+
+def _score(paragraph, reference_keywords):
+    words = _keywords(paragraph)
+    if not words:
+        return 0.0
+    score = len(words & reference_keywords) / len(words)
+    if BOILERPLATE_PATTERNS.search(paragraph):
+        score -= 1.0
+    return score
+
+
+def _truncate_tokens(text, max_tokens, model):
+    if max_tokens <= 0:
+        return ""
+    while text and count_tokens(text, model) > max_tokens:
+        text = text[: int(len(text) * 0.9)]
+    return text
+
+
+def _truncate_both(job_desc, resume_text, available, model):
+    # Splits the budget by ratio of the remaining sizes, with a floor per side,
+    # so a long resume can't squeeze the job description out entirely
+    sizes = {"job": count_tokens(job_desc, model), "resume": count_tokens(resume_text, model)}
+    floors = {key: min(size, int(max(available, 0) * MIN_SIDE_SHARE)) for key, size in sizes.items()}
+    rest = max(available - sum(floors.values()), 0)
+    extra = {key: sizes[key] - floors[key] for key in sizes}
+    extra_total = sum(extra.values()) or 1
+    shares = {key: floors[key] + rest * extra[key] // extra_total for key in sizes}
+    return _truncate_tokens(job_desc, shares["job"], model), _truncate_tokens(resume_text, shares["resume"], model)
+
+
+def fit_inputs_to_budget(job_desc, resume_text, fixed_text="", budget=INPUT_TOKEN_BUDGET,
+                         model="gpt-4o-mini"):
+    original_tokens = count_tokens(job_desc + resume_text + fixed_text, model)
+    job_desc = clean_prompt_text(job_desc)
+    resume_text = clean_prompt_text(resume_text)
+
+    available = budget - count_tokens(fixed_text, model)
+    sections = {"job": _paragraphs(job_desc), "resume": _paragraphs(resume_text)}
+    tokens = {key: [count_tokens(p, model) for p in paragraphs] for key, paragraphs in sections.items()}
+    total = sum(sum(t) for t in tokens.values())
+
+    if total > available:
+        # Each side is scored against the other: resume lines the job doesn't ask
+        # about and job-ad boilerplate are the first to go
+        references = {"job": _keywords(resume_text), "resume": _keywords(job_desc)}
+        candidates = sorted(
+            (_score(p, references[key]), key, i)
+            for key, paragraphs in sections.items()
+            for i, p in enumerate(paragraphs)
+        )
+        dropped = set()
+        left = {key: len(paragraphs) for key, paragraphs in sections.items()}
+        side_tokens = {key: sum(t) for key, t in tokens.items()}
+        floor = available * MIN_SIDE_SHARE
+        for _, key, i in candidates:
+            if total <= available:
+                break
+            # Never drop a whole side (its best-scoring paragraph stays and is
+            # truncated below if needed), nor trim a side already within its floor
+            if left[key] <= 1 or side_tokens[key] <= floor:
+                continue
+            left[key] -= 1
+            side_tokens[key] -= tokens[key][i]
+            dropped.add((key, i))
+            total -= tokens[key][i]
+        for key in sections:
+            sections[key] = [p for i, p in enumerate(sections[key]) if (key, i) not in dropped]
+
+    job_desc = "\n\n".join(sections["job"])
+    resume_text = "\n\n".join(sections["resume"])
+    if total > available:
+        job_desc, resume_text = _truncate_both(job_desc, resume_text, available, model)
+
+    final_tokens = count_tokens(job_desc + resume_text + fixed_text, model)
+    stats = {
+        "original_tokens": original_tokens,
+        "final_tokens": final_tokens,
+        "saved_tokens": original_tokens - final_tokens,
+        "budget": budget,
+    }
+    return job_desc, resume_text, stats
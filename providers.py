@@ -0,0 +1,293 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from llm_client import CallAborted, call_with_retries, get_hf_client, get_openai_client
+
+# Pluggable LLM backends behind one interface, plus a hedging wrapper: if the
+# primary hasn't produced its first token by its recent p95, the secondary is
+# started too and whichever answers first is streamed back.
+#
+# Backends are picked with specs like "openai:gpt-4o-mini",
+# "hf:cohere:CohereLabs/aya-expanse-8b" or "stub" (offline, for testing):
+#   LLM_PRIMARY=openai:gpt-4o LLM_SECONDARY=hf:cohere:CohereLabs/aya-expanse-8b
+
+PRIMARY_SPEC = os.getenv("LLM_PRIMARY", "openai:gpt-4o-mini")
+SECONDARY_SPEC = os.getenv("LLM_SECONDARY", "")
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+# Until enough latencies are recorded the primary gets this long to start answering
+HEDGE_INITIAL_DEADLINE = float(os.getenv("LLM_HEDGE_INITIAL_DEADLINE", "8"))
+HEDGE_MIN_SAMPLES = 10
+
+STUB_RESPONSE = (
+    "=== Adapted Resume ===\n"
+    "Jane Doe\njane@example.com\n\nEXPERIENCE\n- Did relevant things\n\n"
+    "=== Cover Letter ===\n"
+    "Dear Hiring Manager,\n\nI would love to join your team.\n\nKind regards,\nJane Doe\n"
+    "=== End ===\nP.S. text past the end marker that should never reach the user"
+)
+
+
+class Provider:
+    name = "provider"
+
+    # abort (single backends only): a threading.Event; once set, no new
+    # request or retry is started and the stream ends early
+    def stream(self, system_prompt, user_prompt, max_tokens, temperature, stop=None, abort=None):
+        raise NotImplementedError
+
+    def complete(self, system_prompt, user_prompt, max_tokens, temperature, stop=None):
+        return "".join(self.stream(system_prompt, user_prompt, max_tokens, temperature, stop))
+
+
+def _messages(system_prompt, user_prompt):
+    messages = [{"role": "user", "content": user_prompt}]
+    if system_prompt:
+        messages.insert(0, {"role": "system", "content": system_prompt})
+    return messages
+
+
+def _stop_kwargs(stop):
+    return {"stop": stop} if stop else {}
+
+
+def _close(stream):
+    # Stops the HTTP stream when the consumer is done early (e.g. end marker seen)
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+
+class OpenAIProvider(Provider):
+    def __init__(self, model):
+        self.model = model
+        self.name = f"openai:{model}"
+
+    def stream(self, system_prompt, user_prompt, max_tokens, temperature, stop=None, abort=None):
+        stream = call_with_retries(
+            get_openai_client().chat.completions.create,
+            label=f"{self.name}.stream",
+            abort=abort,
+            model=self.model,
+            messages=_messages(system_prompt, user_prompt),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            **_stop_kwargs(stop),
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            _close(stream)
+
+
+class HuggingFaceProvider(Provider):
+    def __init__(self, model, provider="cohere"):
+        self.model = model
+        self.provider = provider
+        self.name = f"hf:{provider}:{model}"
+
+    def stream(self, system_prompt, user_prompt, max_tokens, temperature, stop=None, abort=None):
+        stream = call_with_retries(
+            get_hf_client(self.provider).chat.completions.create,
+            label=f"{self.name}.stream",
+            abort=abort,
+            model=self.model,
+            messages=_messages(system_prompt, user_prompt),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            **_stop_kwargs(stop),
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            _close(stream)
+
+
+class StubProvider(Provider):
+    # Canned, offline backend with controllable latency for exercising hedging
+    def __init__(self, response=STUB_RESPONSE, first_token_delay=0.0, chunk_delay=0.0, chunk_size=16,
+                 error=None, name="stub"):
+        self.response = response
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.error = error
+        self.name = name
+        self.calls = 0
+
+    def stream(self, system_prompt, user_prompt, max_tokens, temperature, stop=None, abort=None):
+        abort = abort or threading.Event()
+        self.calls += 1
+        if abort.wait(self.first_token_delay):
+            return
+        if self.error is not None:
+            raise self.error
+        for i in range(0, len(self.response), self.chunk_size):
+            if i and abort.wait(self.chunk_delay):
+                return
+            yield self.response[i:i + self.chunk_size]
+
+
+class HedgedProvider(Provider):
+    def __init__(self, primary, secondary, percentile=HEDGE_PERCENTILE, initial_deadline=HEDGE_INITIAL_DEADLINE,
+                 min_samples=HEDGE_MIN_SAMPLES, max_samples=200):
+        self.primary = primary
+        self.secondary = secondary
+        self.name = f"hedged({primary.name},{secondary.name})"
+        self.percentile = percentile
+        self.initial_deadline = initial_deadline
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.fallbacks = 0
+        self.wins = {"primary": 0, "secondary": 0}
+
+    def _deadline(self):
+        # Caller holds self._lock
+        samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            return self.initial_deadline
+        return samples[min(len(samples) - 1, int(len(samples) * self.percentile))]
+
+    def deadline(self):
+        with self._lock:
+            return self._deadline()
+
+    def _run(self, role, provider, args, events, stop):
+        # A backend that already lost the race (or whose consumer left) must
+        # not open a stream, nor retry one after a backoff
+        if stop.is_set():
+            return
+        start = time.perf_counter()
+        first = True
+        try:
+            for delta in provider.stream(*args, abort=stop):
+                if first:
+                    first = False
+                    if role == "primary":
+                        # Recorded here, not by the consumer, so a primary that
+                        # loses the race still contributes its latency
+                        with self._lock:
+                            self._latencies.append(time.perf_counter() - start)
+                if stop.is_set():
+                    return
+                events.put((role, "delta", delta))
+            events.put((role, "done", None))
+        except CallAborted:
+            return
+        except Exception as e:
+            events.put((role, "error", e))
+
+    def stream(self, system_prompt, user_prompt, max_tokens, temperature, stop=None):
+        args = (system_prompt, user_prompt, max_tokens, temperature, stop)
+        providers = {"primary": self.primary, "secondary": self.secondary}
+        events = queue.Queue()
+        stops = {role: threading.Event() for role in providers}
+        started = []
+
+        def start(role):
+            started.append(role)
+            threading.Thread(target=self._run, args=(role, providers[role], args, events, stops[role]),
+                             daemon=True).start()
+
+        with self._lock:
+            self.requests += 1
+        begin = time.perf_counter()
+        deadline = self.deadline()
+        start("primary")
+        winner = None
+        failed = 0
+
+        try:
+            while True:
+                timeout = None
+                if winner is None and len(started) == 1:
+                    timeout = max(0.0, begin + deadline - time.perf_counter())
+                try:
+                    role, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self.hedged += 1
+                    print(f"Primary {self.primary.name} slower than {deadline:.2f}s, "
+                          f"hedging with {self.secondary.name}")
+                    start("secondary")
+                    continue
+
+                if winner is None:
+                    if kind == "error":
+                        failed += 1
+                        if len(started) == 1:
+                            with self._lock:
+                                self.fallbacks += 1
+                            print(f"{self.primary.name} failed ({value}), falling back to {self.secondary.name}")
+                            start("secondary")
+                        elif failed == len(started):
+                            raise value
+                        continue
+                    winner = role
+                    with self._lock:
+                        self.wins[winner] += 1
+                    for other, other_stop in stops.items():
+                        if other != winner:
+                            other_stop.set()
+
+                if role != winner:
+                    continue
+                if kind == "delta":
+                    yield value
+                elif kind == "done":
+                    return
+                else:
+                    raise value
+        finally:
+            # Stop whatever is still running if the consumer goes away early
+            for role_stop in stops.values():
+                role_stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "fallbacks": self.fallbacks,
+                "wins": dict(self.wins),
+                "deadline_seconds": self._deadline(),
+                "latency_samples": len(self._latencies),
+            }
+
+
+def provider_from_spec(spec):
+    kind, _, rest = spec.partition(":")
+    if kind == "openai":
+        return OpenAIProvider(rest)
+    if kind == "hf":
+        provider, _, model = rest.partition(":")
+        return HuggingFaceProvider(model, provider)
+    if kind == "stub":
+        return StubProvider()
+    raise ValueError(f"Unknown LLM provider spec: {spec!r}")
+
+
+_generation_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_generation_provider():
+    global _generation_provider
+    with _provider_lock:
+        if _generation_provider is None:
+            provider = provider_from_spec(PRIMARY_SPEC)
+            if SECONDARY_SPEC:
+                provider = HedgedProvider(provider, provider_from_spec(SECONDARY_SPEC))
+            _generation_provider = provider
+        return _generation_provider
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Process-wide admission control for the shared API key. Every request is
+# charged its estimated prompt tokens plus max_tokens against a token bucket
+# that refills at our tokens-per-minute limit. Requests that don't fit wait in
+# per-session queues served round-robin, so one busy session can't starve the
+# others, and callers are told their position while they wait.
+
+TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+# How much of a minute's budget may be spent in a single burst
+BURST_FRACTION = float(os.getenv("LLM_TOKEN_BURST_FRACTION", "0.5"))
+MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "120"))
+# How often a waiting request checks whether it was cancelled
+CANCEL_CHECK_INTERVAL = 0.5
+
+
+class QueueTimeout(TimeoutError):
+    pass
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class Ticket:
+    __slots__ = ("session_id", "cost", "enqueued", "admitted")
+
+    def __init__(self, session_id, cost):
+        self.session_id = session_id
+        self.cost = cost
+        self.enqueued = time.monotonic()
+        self.admitted = None
+
+
+class TokenBucketScheduler:
+    def __init__(self, tokens_per_minute=TOKENS_PER_MINUTE, burst_fraction=BURST_FRACTION):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = max(1, int(tokens_per_minute * burst_fraction))
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._sessions = OrderedDict()  # session_id -> deque of waiting tickets, in round-robin order
+        self._cond = threading.Condition()
+        self.admitted = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _head(self):
+        for tickets in self._sessions.values():
+            return tickets[0]
+        return None
+
+    def _position(self, ticket):
+        # Round-robin order: every session ahead of this one in the rotation
+        # gets one more turn than sessions after it
+        tickets = self._sessions[ticket.session_id]
+        index = tickets.index(ticket)
+        ahead = index
+        before = True
+        for session_id, other in self._sessions.items():
+            if session_id == ticket.session_id:
+                before = False
+                continue
+            ahead += min(len(other), index + (1 if before else 0))
+        return ahead + 1
+
+    def _remove(self, ticket):
+        tickets = self._sessions.get(ticket.session_id)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del self._sessions[ticket.session_id]
+
+    def acquire(self, session_id, cost, on_position=None, timeout=MAX_QUEUE_WAIT, cancel=None):
+        # Oversized requests would never fit, so they wait for a full bucket instead
+        ticket = Ticket(session_id, min(int(cost), self.capacity))
+        deadline = ticket.enqueued + timeout if timeout is not None else None
+        last_position = None
+        with self._cond:
+            self._sessions.setdefault(session_id, deque()).append(ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._head() is ticket and self.tokens >= ticket.cost:
+                        self.tokens -= ticket.cost
+                        self._remove(ticket)
+                        # This session goes to the back of the rotation
+                        if session_id in self._sessions:
+                            self._sessions.move_to_end(session_id)
+                        ticket.admitted = time.monotonic()
+                        self.admitted += 1
+                        self.total_wait += ticket.admitted - ticket.enqueued
+                        self._cond.notify_all()
+                        return ticket
+
+                    if cancel is not None and cancel.is_set():
+                        raise RequestCancelled("Cancelled while waiting for API capacity")
+
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        self.timed_out += 1
+                        raise QueueTimeout(f"Still waiting for API capacity after {timeout:.0f}s")
+
+                    position = self._position(ticket)
+                    if on_position is not None and position != last_position:
+                        last_position = position
+                        # Don't hold the scheduler lock while the UI updates
+                        self._cond.release()
+                        try:
+                            on_position(position)
+                        finally:
+                            self._cond.acquire()
+                        continue
+
+                    if self._head() is ticket:
+                        wait = (ticket.cost - self.tokens) / self.rate
+                    else:
+                        wait = 1.0
+                    if deadline is not None:
+                        wait = min(wait, deadline - now)
+                    if cancel is not None:
+                        wait = min(wait, CANCEL_CHECK_INTERVAL)
+                    self._cond.wait(max(wait, 0.01))
+            except BaseException:
+                # Cancelled, timed out, or on_position raised (e.g. Streamlit's
+                # rerun/stop exceptions): a ticket left behind at the head of
+                # the queue would block every later request
+                self._remove(ticket)
+                self._cond.notify_all()
+                raise
+
+    def release(self, ticket, used_tokens=None):
+        # Give back what the estimate over-reserved (most answers stop well
+        # short of max_tokens)
+        if used_tokens is None or used_tokens >= ticket.cost:
+            return
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + ticket.cost - used_tokens)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            self._refill()
+            return {
+                "available_tokens": int(self.tokens),
+                "capacity": self.capacity,
+                "tokens_per_minute": int(self.rate * 60),
+                "waiting": sum(len(t) for t in self._sessions.values()),
+                "waiting_sessions": len(self._sessions),
+                "admitted": self.admitted,
+                "timed_out": self.timed_out,
+                "average_wait_seconds": self.total_wait / self.admitted if self.admitted else 0.0,
+            }
+
+
+scheduler = TokenBucketScheduler()
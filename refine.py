@@ -0,0 +1,100 @@
+import difflib
+import re
+
+# "Refine" mode: instead of regenerating the resume and cover letter from
+# scratch after a small tweak, the model gets the previous output plus what
+# changed in the instructions and answers with search/replace edit blocks,
+# which are applied here. Output is a few hundred tokens instead of thousands.
+
+REFINE_MAX_TOKENS = 800
+# How similar a SEARCH block must be to the text it replaces when the model
+# didn't copy it exactly (whitespace, punctuation drift)
+FUZZY_MATCH_RATIO = 0.85
+
+REFINE_SYSTEM_PROMPT = (
+    "You are an expert career coach and resume writer.\n"
+    "You are given a resume and cover letter you wrote earlier and a list of changes to the instructions.\n"
+    "Do not rewrite the documents. Reply only with the edits needed, as one or more blocks in exactly this format:\n"
+    "<<<<<<< SEARCH\n"
+    "exact lines copied from the current documents\n"
+    "=======\n"
+    "the replacement lines\n"
+    ">>>>>>> REPLACE\n"
+    "Keep each SEARCH part short but unique. Use as few edits as possible."
+)
+
+EDIT_BLOCK = re.compile(r"<<<<<<< SEARCH\n(.*?)\n?=======\n(.*?)\n?>>>>>>> REPLACE", re.DOTALL)
+
+
+def describe_instruction_changes(previous, current):
+    changes = [
+        line for line in difflib.ndiff(previous.splitlines(), current.splitlines())
+        if line.startswith(("+ ", "- "))
+    ]
+    return "\n".join(
+        ("Now also apply: " if line.startswith("+") else "No longer apply: ") + line[2:].lstrip("- ")
+        for line in changes
+        if line[2:].strip() and not line[2:].startswith("Creative Enhancements to apply")
+    )
+
+
+def build_refine_prompt(document, previous_instructions, instructions, previous_temperature, temperature,
+                        language):
+    changes = describe_instruction_changes(previous_instructions, instructions)
+    if temperature != previous_temperature:
+        tone = "more creative and varied" if temperature > previous_temperature else "more conservative and focused"
+        changes += f"\nMake the wording {tone} than before."
+    return (
+        f"Current documents:\n{document}\n\n"
+        f"Changes to the instructions:\n{changes.strip() or 'Polish the wording; no instruction changes.'}\n\n"
+        f"Keep all output in {language}."
+    )
+
+
+def parse_edits(reply):
+    return [(search, replace) for search, replace in EDIT_BLOCK.findall(reply)]
+
+
+def _fuzzy_span(document, search):
+    # Slide a window of the same number of lines over the document and pick
+    # the closest one
+    doc_lines = document.splitlines(keepends=True)
+    size = max(1, len(search.splitlines()))
+    best_ratio, best_span = 0.0, None
+    offset = 0
+    offsets = []
+    for line in doc_lines:
+        offsets.append(offset)
+        offset += len(line)
+    offsets.append(offset)
+
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(search)
+    for start in range(0, max(1, len(doc_lines) - size + 1)):
+        window = "".join(doc_lines[start:start + size]).rstrip("\n")
+        matcher.set_seq1(window)
+        if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best_ratio:
+            best_ratio = ratio
+            best_span = (offsets[start], offsets[start] + len(window))
+    if best_ratio >= FUZZY_MATCH_RATIO:
+        return best_span
+    return None
+
+
+def apply_edits(document, edits):
+    applied = failed = 0
+    for search, replace in edits:
+        if search and search in document:
+            document = document.replace(search, replace, 1)
+            applied += 1
+            continue
+        span = _fuzzy_span(document, search) if search.strip() else None
+        if span is None:
+            failed += 1
+            continue
+        document = document[:span[0]] + replace + document[span[1]:]
+        applied += 1
+    return document, applied, failed
@@ -0,0 +1,78 @@
+import io
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+
+import streamlit as st
+from docx import Document
+
+from docx_extract import extract_docx_text
+from pdf_extract import extract_pdf_text
+from prompt_budget import INPUT_TOKEN_BUDGET
+from upload_buffer import UploadBuffer, upload_stats
+
+# Part of the extraction cache key (text_cache.py): bump whenever a change
+# here or in the extractors changes the text they return, so entries cached
+# on disk by an older version are not served again
+EXTRACTOR_VERSION = 1
+
+# Most resume text the app extracts: the prompt never holds more than
+# INPUT_TOKEN_BUDGET tokens of it, and twice that leaves fit_inputs_to_budget
+# room to choose the relevant paragraphs. Pages past it are never parsed.
+RESUME_TOKEN_BUDGET = 2 * INPUT_TOKEN_BUDGET
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPES = [
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+]
+
+
+class LocalUpload(io.BytesIO):
+    # Mimics the bits of Streamlit's UploadedFile the extractors rely on, so
+    # files read from disk (benchmarks, batch jobs) go through the same code
+    def __init__(self, path, data):
+        super().__init__(data)
+        self.name = os.path.basename(path)
+        self.size = len(data)
+        self.type = PDF_TYPE if path.lower().endswith(".pdf") else DOCX_TYPES[0]
+
+
+def extract_text_from_pdf(uploaded_file, max_chars=None, max_tokens=None, parallel=True, dedupe=True):
+    upload = UploadBuffer(uploaded_file)
+    with upload as data:
+        text = extract_pdf_text(data, max_chars=max_chars, max_tokens=max_tokens, parallel=parallel,
+                                dedupe=dedupe)
+    print(f"PDF upload: {upload.stats()}, largest upload so far: {upload_stats['largest_upload_bytes']} bytes")
+    return text
+
+
+def extract_text_from_docx(file):
+    try:
+        return extract_docx_text(file)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+        # Fall back to python-docx, which reports a clearer error if the file is really broken
+        print(f"Streaming DOCX extraction failed, falling back to python-docx: {e}")
+        file.seek(0)
+
+    try:
+        doc = Document(file)
+        fullText = []
+        for para in doc.paragraphs:
+            fullText.append(para.text)
+        return "\n".join(fullText).strip()
+    except Exception as e:
+        st.error(f"Error reading DOCX: {e}")
+        return None
+
+
+def extract_resume_text(uploaded_file, max_tokens=None):
+    # max_tokens bounds PDFs, where every page costs a layout pass; DOCX text
+    # is streamed from the XML and cheap enough to read whole
+    if uploaded_file.type == PDF_TYPE:
+        return extract_text_from_pdf(uploaded_file, max_tokens=max_tokens)
+    elif uploaded_file.type in DOCX_TYPES:
+        return extract_text_from_docx(uploaded_file)
+    else:
+        st.error("Unsupported file type. Please upload PDF or DOCX.")
+        return None
@@ -1,16 +1,14 @@
 import os
-from huggingface_hub import InferenceClient
+from providers import HedgedProvider, provider_from_spec
 
-def generate_resume_and_cover_letter(name, job_title, summary, skills, experience, education):
-    hf_api_key = os.getenv("HF_API_KEY")
-    if not hf_api_key:
-        raise ValueError("Missing Hugging Face API key. Please set the HF_API_KEY environment variable.")
+PRIMARY_SPEC = os.getenv("RESUME_GENERATOR_PRIMARY", "hf:cohere:CohereLabs/aya-expanse-8b")
+SECONDARY_SPEC = os.getenv("RESUME_GENERATOR_SECONDARY", "")
 
-    client = InferenceClient(
-        provider="cohere",
-        api_key=hf_api_key,
-    )
+provider = provider_from_spec(PRIMARY_SPEC)
+if SECONDARY_SPEC:
+    provider = HedgedProvider(provider, provider_from_spec(SECONDARY_SPEC))
 
+def generate_resume_and_cover_letter(name, job_title, summary, skills, experience, education):
     prompt = f"""
     Create a professional resume and a personalized cover letter based on the following:
     Name: {name}
@@ -27,17 +25,7 @@ def generate_resume_and_cover_letter(name, job_title, summary, skills, experienc
     ...
     """
 
-    completion = client.chat.completions.create(
-        model="CohereLabs/aya-expanse-8b",
-        messages=[
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-    )
-
-    text = completion.choices[0].message['content']
+    text = provider.complete(None, prompt, max_tokens=None, temperature=None)
 
     if "COVER LETTER:" in text:
         resume_text, cover_letter_text = text.split("COVER LETTER:", 1)
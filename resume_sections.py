@@ -0,0 +1,206 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+# Splits raw resume text into typed sections once per unique text, so the
+# generation step and any local analysis reuse the structure instead of
+# re-scanning the string.
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "objective", "about me", "professional summary", "career objective"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "relevant experience"),
+    "education": ("education", "academic background", "qualifications", "education and training"),
+    "skills": ("skills", "relevant skills", "technical skills", "core competencies", "competencies",
+               "key skills", "skills and abilities"),
+    "projects": ("projects", "selected projects", "academic projects"),
+    "certifications": ("certifications", "certificates", "licenses", "licenses and certifications"),
+    "languages": ("languages",),
+    "awards": ("awards", "honors", "honours", "achievements"),
+    "interests": ("interests", "hobbies", "hobbies and interests"),
+    "references": ("references",),
+}
+_HEADING_LOOKUP = {alias: kind for kind, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+# Sections that never help the model tailor a resume
+PROMPT_SKIP_KINDS = {"references"}
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE = re.compile(r"\+?\(?\d[\d\s().-]{7,}\d")
+LINK = re.compile(r"(?:https?://)?(?:www\.)?(?:linkedin\.com|github\.com)/\S+", re.IGNORECASE)
+DATE_RANGE = re.compile(
+    r"((jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+)?(19|20)\d{2}\s*[-–—to]+\s*"
+    r"(((jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+)?(19|20)\d{2}|present|current|now)",
+    re.IGNORECASE,
+)
+BULLET = re.compile(r"^\s*([-*•●▪■▶]|\d+[.)])\s+")
+
+CACHE_SIZE = 128
+
+
+class Contact:
+    __slots__ = ("name", "emails", "phones", "links", "lines")
+
+    def __init__(self, name, emails, phones, links, lines):
+        self.name = name
+        self.emails = emails
+        self.phones = phones
+        self.links = links
+        self.lines = lines
+
+
+class ExperienceEntry:
+    __slots__ = ("header", "dates", "bullets")
+
+    def __init__(self, header, dates, bullets):
+        self.header = header
+        self.dates = dates
+        self.bullets = bullets
+
+    def text(self):
+        return "\n".join((self.header,) + self.bullets)
+
+
+class Section:
+    __slots__ = ("kind", "heading", "lines")
+
+    def __init__(self, kind, heading, lines):
+        self.kind = kind
+        self.heading = heading
+        self.lines = lines
+
+    def text(self):
+        return "\n".join((self.heading,) + self.lines)
+
+
+class ResumeIndex:
+    __slots__ = ("key", "contact", "sections", "experience", "skills")
+
+    def __init__(self, key, contact, sections, experience, skills):
+        self.key = key
+        self.contact = contact
+        self.sections = sections
+        self.experience = experience
+        self.skills = skills
+
+    def section(self, kind):
+        for section in self.sections:
+            if section.kind == kind:
+                return section
+        return None
+
+    def prompt_text(self, skip_kinds=PROMPT_SKIP_KINDS):
+        parts = ["\n".join(self.contact.lines)] if self.contact.lines else []
+        parts.extend(s.text() for s in self.sections if s.kind not in skip_kinds)
+        return "\n\n".join(parts)
+
+
+def heading_kind(line):
+    candidate = line.strip().strip("*#_:").strip().rstrip(":").strip().lower()
+    if not candidate or len(candidate) > 40:
+        return None
+    return _HEADING_LOOKUP.get(candidate)
+
+
+def _parse_contact(lines):
+    joined = "\n".join(lines)
+    name = next((line.strip("*# ") for line in lines if line.strip("*# ")), "")
+    return Contact(
+        name=name,
+        emails=tuple(EMAIL.findall(joined)),
+        phones=tuple(p.strip() for p in PHONE.findall(joined)),
+        links=tuple(LINK.findall(joined)),
+        lines=tuple(lines),
+    )
+
+
+def _parse_experience(lines):
+    entries = []
+    header_lines, bullets, dates = [], [], ""
+
+    def flush():
+        if header_lines or bullets:
+            entries.append(ExperienceEntry(" | ".join(header_lines), dates, tuple(bullets)))
+
+    for line in lines:
+        if not line.strip():
+            continue
+        if BULLET.match(line):
+            bullets.append(line.strip())
+            continue
+        # A non-bullet line after bullets starts the next job
+        if bullets:
+            flush()
+            header_lines, bullets, dates = [], [], ""
+        header_lines.append(line.strip())
+        match = DATE_RANGE.search(line)
+        if match and not dates:
+            dates = match.group(0)
+    flush()
+    return tuple(entries)
+
+
+def _parse_skills(lines):
+    skills = []
+    for line in lines:
+        line = BULLET.sub("", line)
+        # "Sales & Client Management: negotiation, CRM" -> keep the list after the label
+        if ":" in line:
+            line = line.split(":", 1)[1]
+        skills.extend(s.strip(" *.") for s in re.split(r"[,;|•]", line) if s.strip(" *."))
+    return tuple(skills)
+
+
+def _parse(text, key):
+    contact_lines = []
+    sections = []
+    current = None
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        kind = heading_kind(line)
+        if kind is not None:
+            current = Section(kind, line.strip(), [])
+            sections.append(current)
+        elif current is None:
+            if line.strip():
+                contact_lines.append(line.strip())
+        else:
+            current.lines.append(line)
+
+    for section in sections:
+        while section.lines and not section.lines[-1].strip():
+            section.lines.pop()
+        section.lines = tuple(section.lines)
+
+    experience = tuple(e for s in sections if s.kind == "experience" for e in _parse_experience(s.lines))
+    skills = tuple(k for s in sections if s.kind == "skills" for k in _parse_skills(s.lines))
+    return ResumeIndex(key, _parse_contact(contact_lines), tuple(sections), experience, skills)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse_resume(text):
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+
+    index = _parse(text, key)
+    with _cache_lock:
+        _cache[key] = index
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def resume_prompt_text(text):
+    index = parse_resume(text)
+    # Without recognisable headings we can't tell what's safe to leave out
+    if not index.sections:
+        return text
+    return index.prompt_text()
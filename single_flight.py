@@ -0,0 +1,81 @@
+import threading
+
+# Coalesces identical requests that are in flight at the same time: the first
+# caller for a key (the leader) does the work, everyone arriving before it
+# finishes waits and gets the same result. Streamlit runs every session in its
+# own thread, so a double-click or two users with identical inputs would
+# otherwise each pay for a full API call.
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+    def wait(self, timeout=None):
+        if not self.event.wait(timeout):
+            raise TimeoutError("Timed out waiting for an identical in-flight request")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def acquire(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            self.leaders += 1
+            return call, True
+
+    def complete(self, key, call, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.error = error
+        call.event.set()
+
+    def do(self, key, fn):
+        call, leader = self.acquire(key)
+        if not leader:
+            return call.wait()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.complete(key, call, error=e)
+            raise
+        self.complete(key, call, result=result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+            waiting = sum(call.waiters for call in self._calls.values())
+        total = self.leaders + self.coalesced
+        return {
+            "requests": total,
+            "executed": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesce_rate": self.coalesced / total if total else 0.0,
+            "in_flight": in_flight,
+            "waiting": waiting,
+        }
+
+
+generation_flights = SingleFlight()
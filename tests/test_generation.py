@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+import generation
+from llm_cache import ResponseCache
+from output_budget import END_MARKER
+from providers import StubProvider
+from rate_scheduler import TokenBucketScheduler
+
+ARGS = ("Python developer", "Experience\nBackend developer at Acme", "", "English", 0.7)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = StubProvider(f"Tailored text\n{END_MARKER}\n")
+    monkeypatch.setattr(generation, "get_generation_provider", lambda: provider)
+    monkeypatch.setattr(generation, "response_cache", ResponseCache(":memory:"))
+    monkeypatch.setattr(generation, "record", lambda *args: None)
+    return provider
+
+
+def _drained_scheduler(monkeypatch):
+    scheduler = TokenBucketScheduler(tokens_per_minute=600, burst_fraction=1.0)
+    scheduler.acquire("other", scheduler.capacity)
+    monkeypatch.setattr(generation, "scheduler", scheduler)
+    return scheduler
+
+
+def test_cached_sections_do_not_wait_for_the_rate_budget(provider, monkeypatch):
+    assert generation.generate_concurrently(*ARGS) == ("Tailored text", "Tailored text")
+    assert provider.calls == 2
+
+    scheduler = _drained_scheduler(monkeypatch)
+    # Any wait for the drained bucket would fail straight away
+    cancel = threading.Event()
+    cancel.set()
+    timings = {}
+    result = generation.generate_concurrently(*ARGS, timings=timings, cancel=cancel)
+    assert result == ("Tailored text", "Tailored text")
+    assert provider.calls == 2
+    assert timings["cached"] and timings["queue_seconds"] == 0.0
+    assert scheduler.stats()["admitted"] == 1
+
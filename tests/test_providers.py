@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+import llm_client
+from llm_client import call_with_retries
+from providers import HedgedProvider, Provider, StubProvider
+
+ARGS = ("system", "user", 100, 0.7)
+
+
+def _hedged(primary, secondary, initial_deadline=0.05):
+    return HedgedProvider(primary, secondary, initial_deadline=initial_deadline)
+
+
+def test_fast_primary_is_not_hedged():
+    primary = StubProvider("primary answer", name="primary")
+    secondary = StubProvider("secondary answer", name="secondary")
+    provider = _hedged(primary, secondary, initial_deadline=5)
+
+    assert provider.complete(*ARGS) == "primary answer"
+    assert secondary.calls == 0
+    assert provider.stats()["hedged"] == 0
+
+
+def test_hedges_after_deadline_and_streams_the_first_answer():
+    primary = StubProvider("primary answer", first_token_delay=1.0, name="primary")
+    secondary = StubProvider("secondary answer", name="secondary")
+    provider = _hedged(primary, secondary)
+
+    assert provider.complete(*ARGS) == "secondary answer"
+    stats = provider.stats()
+    assert stats["hedged"] == 1
+    assert stats["wins"] == {"primary": 0, "secondary": 1}
+
+
+def test_falls_back_when_primary_fails():
+    primary = StubProvider(error=RuntimeError("primary down"), name="primary")
+    secondary = StubProvider("secondary answer", name="secondary")
+    provider = _hedged(primary, secondary, initial_deadline=5)
+
+    assert provider.complete(*ARGS) == "secondary answer"
+    stats = provider.stats()
+    assert stats["fallbacks"] == 1
+    assert stats["hedged"] == 0
+
+
+def test_raises_when_both_backends_fail():
+    primary = StubProvider(error=RuntimeError("primary down"), name="primary")
+    secondary = StubProvider(error=RuntimeError("secondary down"), name="secondary")
+    provider = _hedged(primary, secondary, initial_deadline=5)
+
+    with pytest.raises(RuntimeError, match="secondary down"):
+        provider.complete(*ARGS)
+    assert primary.calls == secondary.calls == 1
+
+
+def test_raises_when_both_fail_after_hedging():
+    primary = StubProvider(error=RuntimeError("primary down"), first_token_delay=0.3, name="primary")
+    secondary = StubProvider(error=RuntimeError("secondary down"), name="secondary")
+    provider = _hedged(primary, secondary)
+
+    with pytest.raises(RuntimeError):
+        provider.complete(*ARGS)
+    assert provider.stats()["hedged"] == 1
+
+
+class FlakyProvider(Provider):
+    # Fails its first request with a retryable error, then answers
+    name = "flaky"
+
+    def __init__(self):
+        self.attempts = 0
+
+    def _create(self):
+        self.attempts += 1
+        if self.attempts == 1:
+            raise TimeoutError("first attempt times out")
+        return iter(["late answer"])
+
+    def stream(self, system_prompt, user_prompt, max_tokens, temperature, stop=None, abort=None):
+        yield from call_with_retries(self._create, label="flaky", abort=abort)
+
+
+def test_losing_backend_does_not_retry_after_the_race_is_decided(monkeypatch):
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda attempt, error=None: 0.5)
+    primary = FlakyProvider()
+    secondary = StubProvider("secondary answer", name="secondary")
+    provider = _hedged(primary, secondary)
+
+    assert provider.complete(*ARGS) == "secondary answer"
+    # Past the primary's backoff: its retry would have happened by now
+    time.sleep(0.7)
+    assert primary.attempts == 1
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from rate_scheduler import QueueTimeout, RequestCancelled, TokenBucketScheduler
+
+
+class Rerun(BaseException):
+    # Stands in for Streamlit's rerun/stop exceptions, which aren't Exceptions
+    pass
+
+
+def _drained_scheduler():
+    # 600 tokens per minute refill far too slowly to matter within a test
+    scheduler = TokenBucketScheduler(tokens_per_minute=600, burst_fraction=1.0)
+    ticket = scheduler.acquire("a", scheduler.capacity)
+    return scheduler, ticket
+
+
+def test_raising_on_position_does_not_leave_a_ticket_behind():
+    scheduler, ticket = _drained_scheduler()
+
+    def on_position(position):
+        raise Rerun()
+
+    with pytest.raises(Rerun):
+        scheduler.acquire("b", 100, on_position=on_position, timeout=5)
+    assert scheduler.stats()["waiting"] == 0
+
+    # With the bucket full again, another session must get straight in
+    scheduler.release(ticket, 0)
+    assert scheduler.acquire("c", 100, timeout=0.5) is not None
+
+
+def test_cancel_and_timeout_remove_the_ticket():
+    scheduler, _ = _drained_scheduler()
+
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(RequestCancelled):
+        scheduler.acquire("b", 100, cancel=cancel)
+    with pytest.raises(QueueTimeout):
+        scheduler.acquire("c", 100, timeout=0.05)
+
+    stats = scheduler.stats()
+    assert stats["waiting"] == 0
+    assert stats["timed_out"] == 1
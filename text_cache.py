@@ -0,0 +1,218 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Extracted resume text is cached by a hash of the uploaded bytes so that a
+# Streamlit rerun (any widget click) doesn't re-parse the same PDF/DOCX.
+# Tier 1 is an in-process LRU bounded by bytes, tier 2 is a directory on disk
+# that survives restarts, bounded by total size and entry age.
+
+DEFAULT_MEMORY_BUDGET = 32 * 1024 * 1024
+DEFAULT_CACHE_DIR = os.getenv(
+    "RESUME_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "resume_tailor", "extract"),
+)
+DEFAULT_DISK_BUDGET = int(os.getenv("RESUME_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+# Entries not read for this long are removed (seconds, default 30 days)
+DEFAULT_DISK_MAX_AGE = float(os.getenv("RESUME_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+
+def content_key(data, namespace=""):
+    # The namespace (e.g. MIME type or extraction mode) is folded into the hash
+    # so it never ends up as raw text in a file name
+    h = hashlib.sha256(namespace.encode("utf-8"))
+    h.update(b"\0")
+    h.update(data)
+    return h.hexdigest()
+
+
+class LRUByteCache:
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BUDGET):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.current_bytes -= self._items.pop(key)[1]
+            self._items[key] = (text, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.current_bytes -= evicted
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._items),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class DiskTextCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_DISK_BUDGET, max_age=DEFAULT_DISK_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            # The modification time doubles as "last used" for eviction
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def prune(self):
+        # Drops entries older than max_age, then the least recently used ones
+        # until the directory fits in max_bytes
+        with self._lock:
+            try:
+                entries = []
+                with os.scandir(self.directory) as it:
+                    for entry in it:
+                        if entry.name.endswith(".txt"):
+                            st = entry.stat()
+                            entries.append((st.st_mtime, st.st_size, entry.path))
+            except OSError:
+                return
+            cutoff = time.time() - self.max_age
+            total = sum(size for _, size, _ in entries)
+            for mtime, size, path in sorted(entries):
+                if mtime >= cutoff and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+    def put(self, key, text):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temp file first so a crash never leaves a half-written entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Could not write extraction cache entry {key}: {e}")
+            return
+        self.prune()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "directory": self.directory,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+        }
+
+
+class TwoTierTextCache:
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else LRUByteCache()
+        self.disk = disk if disk is not None else DiskTextCache()
+
+    def get(self, key):
+        text = self.memory.get(key)
+        if text is not None:
+            return text
+        text = self.disk.get(key)
+        if text is not None:
+            # Promote disk hits so the next rerun is served from memory
+            self.memory.put(key, text)
+        return text
+
+    def put(self, key, text):
+        self.memory.put(key, text)
+        self.disk.put(key, text)
+
+    def stats(self):
+        return {"memory": self.memory.stats(), "disk": self.disk.stats()}
+
+
+extraction_cache = TwoTierTextCache()
+
+
+# Upload key by Streamlit file_id, so reruns (several per second while a job
+# or export is pending) don't hash the same upload again
+UPLOAD_KEYS_ENTRIES = 256
+_upload_keys = OrderedDict()
+_upload_keys_lock = threading.Lock()
+
+
+def upload_key(uploaded_file, namespace=""):
+    namespace = namespace or getattr(uploaded_file, "type", "")
+    file_id = getattr(uploaded_file, "file_id", None)
+    memo_key = (file_id, namespace)
+    if file_id is not None:
+        with _upload_keys_lock:
+            key = _upload_keys.get(memo_key)
+            if key is not None:
+                _upload_keys.move_to_end(memo_key)
+                return key
+    if hasattr(uploaded_file, "getbuffer"):
+        # Hash a view over the upload instead of a getvalue() copy
+        with uploaded_file.getbuffer() as data:
+            key = content_key(data, namespace)
+    else:
+        key = content_key(uploaded_file.getvalue(), namespace)
+    if file_id is not None:
+        with _upload_keys_lock:
+            _upload_keys[memo_key] = key
+            while len(_upload_keys) > UPLOAD_KEYS_ENTRIES:
+                _upload_keys.popitem(last=False)
+    return key
+
+
+def cached_extract(uploaded_file, extract_fn, namespace=""):
+    # The namespace should name the extractor and its version: the disk tier
+    # is shared by every app in this repo and outlives code changes
+    key = upload_key(uploaded_file, namespace)
+    text = extraction_cache.get(key)
+    if text is not None:
+        return text
+
+    uploaded_file.seek(0)
+    text = extract_fn(uploaded_file)
+    # Failed extractions return None and are retried on the next rerun
+    if text:
+        extraction_cache.put(key, text)
+    return text
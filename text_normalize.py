@@ -0,0 +1,165 @@
+import codecs
+import threading
+import unicodedata
+
+# Maps text onto what a legacy charset (latin-1 for FPDF's core fonts) can
+# encode. Common typography has explicit replacements; every other character
+# outside the charset falls back to its NFKD decomposition minus whatever still
+# can't be encoded (accents on letters like "ő" are dropped, "ﬁ" becomes
+# "fi"), or "?" if nothing is left. Fallbacks are worked out the first time a
+# character is seen and kept in the table.
+
+REPLACEMENTS = {
+    # dashes and minus
+    "\u2010": "-", "\u2011": "-", "\u2012": "-", "\u2013": "-", "\u2014": "-", "\u2015": "-", "\u2212": "-",
+    # quotes and primes
+    "\u2018": "'", "\u2019": "'", "\u201a": "'", "\u201b": "'", "\u2032": "'",
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u201f": '"', "\u2033": '"',
+    "\u2039": "<", "\u203a": ">",
+    "\u2026": "...",
+    # bullets and list markers
+    "\u2022": "-", "\u2023": "-", "\u2043": "-", "\u2219": "-", "\u25aa": "-", "\u25ab": "-", "\u25a0": "-",
+    "\u25a1": "-", "\u25b6": "-", "\u25ba": "-", "\u25cb": "-", "\u25cf": "-", "\u25e6": "-", "\u2713": "-",
+    "\u2714": "-", "\u27a2": "-", "\uf0b7": "-", "\uf0a7": "-",  # last two: Symbol-font bullets from Word
+    # invisible characters
+    "\u200b": "", "\u200c": "", "\u200d": "", "\u2060": "", "\ufeff": "",
+    "\u20ac": "EUR",
+    "\u2192": "->", "\u2190": "<-",
+}
+FALLBACK = "?"
+# Distinct rejected characters replaced one str.replace pass at a time before
+# the rest of the text goes through the codecs error handler
+MAX_REPLACE_PASSES = 16
+
+
+class TranslationTable(dict):
+    # A str.translate table for one target encoding, filled in lazily for
+    # characters outside the explicit replacements
+    def __init__(self, encoding):
+        super().__init__()
+        self.encoding = encoding
+        # Registered per encoding: the error doesn't name it reliably
+        # (charmap codecs like cp1252 report "charmap")
+        self.error_handler = f"normalize_text.{encoding}"
+        codecs.register_error(self.error_handler, self._replace_unencodable)
+        for code in range(256):
+            if self._encodable(chr(code)):
+                self[code] = chr(code)
+        for char, replacement in REPLACEMENTS.items():
+            if not self._encodable(char):
+                self[ord(char)] = replacement
+
+    def _encodable(self, text):
+        try:
+            text.encode(self.encoding)
+        except UnicodeEncodeError:
+            return False
+        return True
+
+    def _replace_unencodable(self, error):
+        # Called by the encoder once per run of characters it rejects
+        return "".join([self[ord(char)] for char in error.object[error.start:error.end]]), error.end
+
+    def __missing__(self, code):
+        char = chr(code)
+        if self._encodable(char):
+            replacement = char
+        else:
+            replacement = "".join(
+                part for part in unicodedata.normalize("NFKD", char)
+                if not unicodedata.combining(part) and self._encodable(part)
+            ) or FALLBACK
+        # Racing threads compute the same value, so no lock is needed
+        self[code] = replacement
+        return replacement
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def translation_table(encoding="latin-1"):
+    # Canonical name, since the encoder may spell it differently ("iso8859-1")
+    encoding = codecs.lookup(encoding).name
+    with _tables_lock:
+        table = _tables.get(encoding)
+        if table is None:
+            table = _tables[encoding] = TranslationTable(encoding)
+        return table
+
+
+def normalize_text(text, encoding="latin-1"):
+    # The result always encodes with `encoding`. Typical text has a handful
+    # of distinct characters outside the charset; each is replaced
+    # everywhere at once, so text already in the charset costs a single
+    # encode. Past MAX_REPLACE_PASSES distinct characters (CJK, emoji), one
+    # encode with the table's error handler finishes the job in a single
+    # pass instead of a replace per character.
+    table = translation_table(encoding)
+    for _ in range(MAX_REPLACE_PASSES):
+        try:
+            text.encode(encoding)
+        except UnicodeEncodeError as e:
+            char = text[e.start]
+            text = text.replace(char, table[ord(char)])
+            continue
+        return text
+    return text.encode(encoding, errors=table.error_handler).decode(encoding)
+
+
+translation_table()
+
+
+if __name__ == "__main__":
+    # Compares with the replace-per-entry loop the PDF export used before,
+    # and with a plain str.translate pass:  python text_normalize.py [megabytes]
+    import sys
+    import time
+
+    def replace_loop(text):
+        replacements = {
+            '\u2013': '-', '\u2014': '-',
+            '\u2018': "'", '\u2019': "'",
+            '\u201c': '"', '\u201d': '"',
+            '\u2026': '...', '\u2022': '-',
+            '\u25cf': '-', '\u25a0': '-', '\u25b6': '-', '\u25aa': '-',
+        }
+        for k, v in replacements.items():
+            text = text.replace(k, v)
+        return text
+
+    def translate_pass(text):
+        return text.translate(translation_table())
+
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    resume_lines = (
+        "• Led the Platform team of 5 engineers and 40 analysts, cut report time by 60% – on budget.\n"
+        + "Built pipelines in Python and SQL for the finance department, with “zero” downtime.\n" * 4
+    )
+    dense_lines = (
+        "• Led the “Platform” team – 5 engineers, 40 analysts… "
+        "Café naïve résumé, Erdős, ﬁnance, 20 %, €5k\n"
+    )
+    inputs = {
+        name: lines * int(megabytes * 1024 * 1024 / len(lines.encode("utf-8")))
+        for name, lines in (("resume-like", resume_lines), ("dense typography", dense_lines))
+    }
+    inputs["plain ASCII"] = "- Led the Platform team of 5 engineers.\n" * (len(inputs["resume-like"]) // 40)
+    # Latin-1 text followed by thousands of distinct characters outside it
+    inputs["many distinct (CJK)"] = inputs["plain ASCII"] + "".join(chr(0x4E00 + i) for i in range(3000))
+
+    for name, text in inputs.items():
+        print(f"{name}: {len(text) / 1e6:.1f}M characters")
+        for label, fn in (("replace loop", replace_loop), ("str.translate", translate_pass),
+                          ("normalize_text", normalize_text)):
+            fn(text)
+            start = time.perf_counter()
+            for _ in range(5):
+                result = fn(text)
+            elapsed = (time.perf_counter() - start) / 5
+            try:
+                result.encode("latin-1")
+                encodes = "ok"
+            except UnicodeEncodeError:
+                encodes = "FAILS latin-1"
+            print(f"  {label:>15}: {elapsed * 1000:8.1f} ms  {encodes}")
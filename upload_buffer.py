@@ -0,0 +1,90 @@
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+
+# Uploads up to this size are handed to PyMuPDF as a view over Streamlit's own
+# buffer; anything larger is spooled to a memory-mapped temp file so the OS can
+# page it instead of each session pinning another full copy in RAM.
+SPOOL_THRESHOLD = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", str(8 * 1024 * 1024)))
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_stats_lock = threading.Lock()
+upload_stats = {"uploads": 0, "spooled": 0, "largest_upload_bytes": 0, "largest_copied_bytes": 0}
+
+
+def _upload_size(uploaded_file):
+    size = getattr(uploaded_file, "size", None)
+    if size is not None:
+        return size
+    position = uploaded_file.tell()
+    uploaded_file.seek(0, os.SEEK_END)
+    size = uploaded_file.tell()
+    uploaded_file.seek(position)
+    return size
+
+
+class UploadBuffer:
+    def __init__(self, uploaded_file, spool_threshold=SPOOL_THRESHOLD):
+        self.uploaded_file = uploaded_file
+        self.spool_threshold = spool_threshold
+        self.size = _upload_size(uploaded_file)
+        self.spooled = False
+        # Bytes this layer copied into process memory (0 when zero-copy)
+        self.copied_bytes = 0
+        self._view = None
+        self._mmap = None
+        self._spool = None
+
+    def __enter__(self):
+        if self.size > self.spool_threshold:
+            self._view = self._spool_to_disk()
+        elif hasattr(self.uploaded_file, "getbuffer"):
+            self._view = self.uploaded_file.getbuffer()
+        else:
+            self.uploaded_file.seek(0)
+            self._view = memoryview(self.uploaded_file.read())
+            self.copied_bytes = self.size
+        self._record()
+        return self._view
+
+    def __exit__(self, exc_type, exc, tb):
+        # PyMuPDF may still hold an export of the view until its document is
+        # garbage collected; in that case let GC release it instead of failing
+        try:
+            self._view.release()
+        except BufferError:
+            pass
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+        if self._spool is not None:
+            self._spool.close()
+        return False
+
+    def _spool_to_disk(self):
+        self.spooled = True
+        self._spool = tempfile.TemporaryFile(prefix="resume-upload-")
+        if hasattr(self.uploaded_file, "getbuffer"):
+            with self.uploaded_file.getbuffer() as source:
+                self._spool.write(source)
+        else:
+            self.uploaded_file.seek(0)
+            shutil.copyfileobj(self.uploaded_file, self._spool, COPY_CHUNK_SIZE)
+            self.copied_bytes = COPY_CHUNK_SIZE
+        self._spool.flush()
+        self._mmap = mmap.mmap(self._spool.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def _record(self):
+        with _stats_lock:
+            upload_stats["uploads"] += 1
+            upload_stats["spooled"] += int(self.spooled)
+            upload_stats["largest_upload_bytes"] = max(upload_stats["largest_upload_bytes"], self.size)
+            upload_stats["largest_copied_bytes"] = max(upload_stats["largest_copied_bytes"], self.copied_bytes)
+
+    def stats(self):
+        return {"size": self.size, "spooled": self.spooled, "copied_bytes": self.copied_bytes}